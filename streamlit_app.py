@@ -1,108 +1,1807 @@
-import React, { useState } from 'react';
-import { Shield, Phone, Mail, Link, AlertTriangle, CheckCircle, XCircle, Search, Database, TrendingUp, MessageSquare, HelpCircle, FileText, Globe } from 'lucide-react';
+import React, { useState, useEffect, useRef } from 'react';
+import { Shield, Activity, Server, Clock, Phone, Mail, Link, AlertTriangle, CheckCircle, XCircle, Search, Database, TrendingUp, MessageSquare, HelpCircle, FileText, Globe } from 'lucide-react';
+
+// クイズデータ（手作りの問題。生成問題と一緒に問題バンクへ入る）
+const quizSamples = [
+  {
+    subject: "【重要】あなたのアカウントが一時停止されました",
+    content: "お客様のアカウントに不審なアクセスが検出されました。以下のリンクから確認してください。\n→ http://security-update-login.com",
+    isPhishing: true,
+    explanation: "正規のドメインではなく、不審なURLを使用しています。",
+    category: 'account',
+    difficulty: 1
+  },
+  {
+    subject: "【Amazon】ご注文ありがとうございます",
+    content: "ご注文いただいた商品は10月12日に発送されます。ご利用ありがとうございます。",
+    isPhishing: false,
+    explanation: "内容は自然で、URLも含まれていません。正規の連絡の可能性が高いです。",
+    category: 'shopping',
+    difficulty: 1
+  },
+  {
+    subject: "【Apple ID】アカウント情報の確認が必要です",
+    content: "セキュリティのため、以下のURLから24時間以内に情報を更新してください。\n→ http://apple.login-check.xyz",
+    isPhishing: true,
+    explanation: "URLが公式のAppleドメインではありません。典型的なフィッシングサイトの形式です。",
+    category: 'account',
+    difficulty: 2
+  }
+];
+
+// 再現可能な疑似乱数（mulberry32）
+const createRandom = (seed) => {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6d2b79f5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+};
 
-const ScamPreventionApp = () => {
-  const [activeTab, setActiveTab] = useState('home');
-  const [phoneNumber, setPhoneNumber] = useState('');
-  const [urlInput, setUrlInput] = useState('');
-  const [emailContent, setEmailContent] = useState('');
-  const [analysisResult, setAnalysisResult] = useState(null);
-  const [quizIndex, setQuizIndex] = useState(0);
-  const [quizScore, setQuizScore] = useState(0);
-  const [quizAnswered, setQuizAnswered] = useState(false);
+const pickOne = (random, list) => list[Math.floor(random() * list.length)];
+
+// 問題生成用のブランドと文面
+const QUIZ_CATEGORIES = ['account', 'shopping', 'delivery', 'bank'];
+const QUIZ_CATEGORY_LABELS = { account: 'アカウント', shopping: '通販', delivery: '宅配', bank: '銀行' };
+const QUIZ_DIFFICULTIES = [1, 2, 3];
+const QUIZ_DIFFICULTY_LABELS = { 1: '初級', 2: '中級', 3: '上級' };
+const QUIZ_BANK_SIZE = 20000;
+const QUIZ_BANK_SEED = 20251012;
+const QUIZ_ROUND_SIZE = 10;
+
+const QUIZ_BRANDS = {
+  account: [
+    { name: 'Apple ID', slug: 'apple', domain: 'apple.com' },
+    { name: 'Google', slug: 'google', domain: 'google.com' },
+    { name: 'Microsoft', slug: 'microsoft', domain: 'microsoft.com' },
+    { name: 'LINE', slug: 'line', domain: 'line.me' }
+  ],
+  shopping: [
+    { name: 'Amazon', slug: 'amazon', domain: 'amazon.co.jp' },
+    { name: '楽天市場', slug: 'rakuten', domain: 'rakuten.co.jp' },
+    { name: 'メルカリ', slug: 'mercari', domain: 'mercari.com' }
+  ],
+  delivery: [
+    { name: 'ヤマト運輸', slug: 'yamato', domain: 'kuronekoyamato.co.jp' },
+    { name: '佐川急便', slug: 'sagawa', domain: 'sagawa-exp.co.jp' },
+    { name: '日本郵便', slug: 'japanpost', domain: 'post.japanpost.jp' }
+  ],
+  bank: [
+    { name: '三井住友銀行', slug: 'smbc', domain: 'smbc.co.jp' },
+    { name: '三菱UFJ銀行', slug: 'mufg', domain: 'bk.mufg.jp' },
+    { name: 'みずほ銀行', slug: 'mizuho', domain: 'mizuhobank.co.jp' }
+  ]
+};
+
+const QUIZ_PHISHING_TEXT = {
+  account: { subject: 'アカウントが一時停止されました', content: 'お客様のアカウントに不審なログインがありました。以下から本人確認を行ってください。' },
+  shopping: { subject: 'お支払い方法に問題があります', content: 'ご登録のクレジットカードが利用できませんでした。以下からお支払い情報を更新してください。' },
+  delivery: { subject: 'お荷物をお届けできませんでした', content: 'ご不在のためお荷物を持ち帰りました。以下から再配達の手続きをしてください。' },
+  bank: { subject: '取引を一時的に制限しました', content: 'セキュリティ強化のため、以下からパスワード更新と本人確認をお願いします。' }
+};
+
+const QUIZ_LEGIT_TEXT = {
+  account: { subject: 'ログインのお知らせ', content: '新しい端末からログインがありました。心当たりがない場合は、アプリの設定画面からパスワードを変更してください。' },
+  shopping: { subject: 'ご注文ありがとうございます', content: 'ご注文の商品を発送しました。配送状況はアプリの注文履歴からご確認いただけます。' },
+  delivery: { subject: 'お届け予定のお知らせ', content: 'お荷物は明日お届け予定です。日時の変更は公式アプリから承ります。' },
+  bank: { subject: 'お振込みのお知らせ', content: 'お振込みを受け付けました。詳細は公式アプリの入出金明細でご確認ください。' }
+};
+
+const QUIZ_URGENCY = ['', '24時間以内に', '今すぐ', '本日中に'];
+
+const lookalikeDomain = (random, brand) => {
+  const [label, ...rest] = brand.domain.split('.');
+  const swapped = label.replace(/o/, '0').replace(/l/, '1');
+  if (swapped !== label && random() < 0.5) return [swapped, ...rest].join('.');
+  return `${brand.domain}.${pickOne(random, ['secure-login', 'account-check', 'id-verify'])}.com`;
+};
 
-  // クイズデータ
-  const quizSamples = [
-    {
-      subject: "【重要】あなたのアカウントが一時停止されました",
-      content: "お客様のアカウントに不審なアクセスが検出されました。以下のリンクから確認してください。\n→ http://security-update-login.com",
+// 難易度ごとの詐欺URL（上級ほど本物に似せる）
+const phishingUrl = (random, brand, difficulty) => {
+  if (difficulty === 1) return `http://${brand.slug}-login-check.xyz`;
+  if (difficulty === 2) return `https://${brand.slug}-${pickOne(random, ['secure', 'verify', 'support'])}.com/login`;
+  return `https://${lookalikeDomain(random, brand)}/signin`;
+};
+
+const generateQuizItem = (random, category, difficulty) => {
+  const brand = pickOne(random, QUIZ_BRANDS[category]);
+  if (random() < 0.5) {
+    const text = QUIZ_PHISHING_TEXT[category];
+    const url = phishingUrl(random, brand, difficulty);
+    const urgency = difficulty === 3 ? '' : pickOne(random, QUIZ_URGENCY);
+    return {
+      subject: `【${brand.name}】${text.subject}`,
+      content: `${text.content}${urgency ? `\n${urgency}手続きしない場合、ご利用を停止します。` : ''}\n→ ${url}`,
       isPhishing: true,
-      explanation: "正規のドメインではなく、不審なURLを使用しています。"
-    },
-    {
-      subject: "【Amazon】ご注文ありがとうございます",
-      content: "ご注文いただいた商品は10月12日に発送されます。ご利用ありがとうございます。",
-      isPhishing: false,
-      explanation: "内容は自然で、URLも含まれていません。正規の連絡の可能性が高いです。"
+      explanation: `リンク先 ${new URL(url).hostname} は${brand.name}の公式ドメイン（${brand.domain}）ではありません。`,
+      category,
+      difficulty
+    };
+  }
+  const text = QUIZ_LEGIT_TEXT[category];
+  const withLink = difficulty > 1 && random() < 0.5;
+  return {
+    subject: `【${brand.name}】${text.subject}`,
+    content: withLink ? `${text.content}\n→ https://www.${brand.domain}/` : text.content,
+    isPhishing: false,
+    explanation: withLink
+      ? `リンク先は${brand.name}の公式ドメイン（${brand.domain}）で、情報の入力も求めていません。`
+      : '個人情報の入力を求めず、公式アプリでの確認を案内しています。正規の連絡の可能性が高いです。',
+    category,
+    difficulty
+  };
+};
+
+const generateQuizBank = (size, seed) => {
+  const random = createRandom(seed);
+  const items = quizSamples.map(sample => ({ ...sample }));
+  while (items.length < size) {
+    items.push(generateQuizItem(random, pickOne(random, QUIZ_CATEGORIES), pickOne(random, QUIZ_DIFFICULTIES)));
+  }
+  return items.map((item, id) => ({ id, ...item }));
+};
+
+// 問題バンク（ID・難易度・カテゴリで引ける索引付き）
+const createQuestionBank = (items) => {
+  const byKey = new Map();
+  items.forEach(item => {
+    const key = `${item.category}:${item.difficulty}`;
+    if (!byKey.has(key)) byKey.set(key, []);
+    byKey.get(key).push(item.id);
+  });
+  return {
+    size: items.length,
+    get: (id) => items[id],
+    idsFor: (category, difficulty) => byKey.get(`${category}:${difficulty}`) || []
+  };
+};
+
+let quizBankCache = null;
+const getQuizBank = () => quizBankCache || (quizBankCache = createQuestionBank(generateQuizBank(QUIZ_BANK_SIZE, QUIZ_BANK_SEED)));
+
+// 復習期限の最小ヒープ（次の問題を O(log n) で取り出す）
+const createDueHeap = () => {
+  const heap = [];
+  const swap = (i, j) => { [heap[i], heap[j]] = [heap[j], heap[i]]; };
+  return {
+    get size() { return heap.length; },
+    peek: () => heap[0],
+    push(entry) {
+      heap.push(entry);
+      let i = heap.length - 1;
+      while (i > 0) {
+        const parent = (i - 1) >> 1;
+        if (heap[parent].due <= heap[i].due) break;
+        swap(i, parent);
+        i = parent;
+      }
     },
-    {
-      subject: "【Apple ID】アカウント情報の確認が必要です",
-      content: "セキュリティのため、以下のURLから24時間以内に情報を更新してください。\n→ http://apple.login-check.xyz",
-      isPhishing: true,
-      explanation: "URLが公式のAppleドメインではありません。典型的なフィッシングサイトの形式です。"
+    pop() {
+      const top = heap[0];
+      const last = heap.pop();
+      if (heap.length > 0) {
+        heap[0] = last;
+        let i = 0;
+        for (;;) {
+          const left = i * 2 + 1;
+          const right = left + 1;
+          let smallest = i;
+          if (left < heap.length && heap[left].due < heap[smallest].due) smallest = left;
+          if (right < heap.length && heap[right].due < heap[smallest].due) smallest = right;
+          if (smallest === i) break;
+          swap(i, smallest);
+          i = smallest;
+        }
+      }
+      return top;
     }
-  ];
+  };
+};
 
-  // 電話番号分析
-  const analyzePhoneNumber = (number) => {
-    const normalized = number.replace(/[-\s()]+/g, '');
-    let riskLevel = '安全';
-    let riskScore = 10;
-    const warnings = [];
-    const details = [];
-    let callerType = { type: '不明', category: 'その他', confidence: '低' };
-
-    // 緊急番号チェック
-    if (['110', '119', '118'].includes(normalized)) {
-      callerType = { type: '緊急通報番号', category: '公的機関', confidence: '確実' };
-      riskLevel = '緊急';
-      details.push('✅ 緊急通報番号です');
-    }
-    // 公的機関パターン
-    else if (normalized.startsWith('033581') || normalized.startsWith('035253')) {
-      callerType = { type: '公的機関', category: '公的機関', confidence: '高' };
-      details.push('🏛️ 官公庁の番号パターン');
-    }
-    // フリーダイヤル
-    else if (normalized.startsWith('0120') || normalized.startsWith('0800')) {
-      callerType = { type: '企業カスタマーサポート', category: '一般企業', confidence: '中' };
-      details.push('📞 フリーダイヤル（通話無料）');
-    }
-    // IP電話（要注意）
-    else if (normalized.startsWith('050')) {
-      callerType = { type: 'IP電話利用者', category: '不明', confidence: '低' };
-      warnings.push('⚠️ IP電話は匿名性が高く、詐欺に悪用されやすい');
-      riskLevel = '注意';
-      riskScore = 60;
+// 学習者ごとの間隔反復スケジューラ
+const QUIZ_RECENT_WINDOW = 10;
+const QUIZ_FIRST_INTERVAL_MS = 60 * 1000;
+const QUIZ_SECOND_INTERVAL_MS = 10 * 60 * 1000;
+
+const createLearner = (id) => ({ id, level: 1, recent: [], cursors: {}, categoryTurn: 0, cards: {} });
+
+const buildDueHeap = (learner) => {
+  const heap = createDueHeap();
+  Object.keys(learner.cards).forEach(id => heap.push({ id: Number(id), due: learner.cards[id].due }));
+  return heap;
+};
+
+// 期限切れの復習を優先し、なければ現在のレベルの新しい問題を出す
+const nextQuizItem = (learner, heap, bank, now = Date.now()) => {
+  if (heap.size > 0 && heap.peek().due <= now) return heap.pop().id;
+  for (let attempt = 0; attempt < QUIZ_CATEGORIES.length; attempt++) {
+    const category = QUIZ_CATEGORIES[(learner.categoryTurn + attempt) % QUIZ_CATEGORIES.length];
+    const key = `${category}:${learner.level}`;
+    const ids = bank.idsFor(category, learner.level);
+    let cursor = learner.cursors[key] || 0;
+    while (cursor < ids.length && learner.cards[ids[cursor]]) cursor++;
+    learner.cursors[key] = cursor;
+    if (cursor < ids.length) {
+      learner.categoryTurn = (learner.categoryTurn + attempt + 1) % QUIZ_CATEGORIES.length;
+      return ids[cursor];
     }
-    // 携帯電話
-    else if (normalized.startsWith('090') || normalized.startsWith('080') || normalized.startsWith('070')) {
-      callerType = { type: '個人携帯電話', category: '個人', confidence: '高' };
-      details.push('📱 個人契約の携帯電話');
+  }
+  return heap.size > 0 ? heap.pop().id : null;
+};
+
+const recordQuizAnswer = (learner, heap, itemId, correct, now = Date.now()) => {
+  const card = learner.cards[itemId] || { reps: 0, lapses: 0, ease: 2.5, interval: 0, due: now };
+  if (correct) {
+    card.reps += 1;
+    card.interval = card.reps === 1 ? QUIZ_FIRST_INTERVAL_MS
+      : card.reps === 2 ? QUIZ_SECOND_INTERVAL_MS
+      : Math.round(card.interval * card.ease);
+    card.ease = Math.min(card.ease + 0.1, 3);
+  } else {
+    card.reps = 0;
+    card.lapses += 1;
+    card.interval = QUIZ_FIRST_INTERVAL_MS;
+    card.ease = Math.max(card.ease - 0.2, 1.3);
+  }
+  card.due = now + card.interval;
+  learner.cards[itemId] = card;
+  heap.push({ id: itemId, due: card.due });
+
+  // 直近の正答率で難易度を調整
+  learner.recent = [...learner.recent, correct].slice(-QUIZ_RECENT_WINDOW);
+  if (learner.recent.length === QUIZ_RECENT_WINDOW) {
+    const accuracy = learner.recent.filter(Boolean).length / QUIZ_RECENT_WINDOW;
+    if (accuracy >= 0.8 && learner.level < QUIZ_DIFFICULTIES.length) {
+      learner.level += 1;
+      learner.recent = [];
+    } else if (accuracy < 0.5 && learner.level > 1) {
+      learner.level -= 1;
+      learner.recent = [];
     }
-    // 国際電話
-    else if (number.startsWith('+') || normalized.startsWith('010')) {
-      callerType = { type: '国際電話', category: '国際', confidence: '確実' };
-      warnings.push('🌍 国際電話 - 身に覚えがない場合は応答しない');
-      riskLevel = '注意';
-      riskScore = 70;
+  }
+};
+
+// 保存先が使えないときは、その場限りの進捗で続ける
+const loadLearner = (id) => idbRequest('learners', 'readonly', store => store.get(id))
+  .then(saved => saved || createLearner(id))
+  .catch(() => createLearner(id));
+const saveLearner = (learner) => idbRequest('learners', 'readwrite', store => store.put(learner));
+
+// 既知の詐欺番号パターン（比較用の数字列は起動時に一度だけ作る）
+const SCAM_NUMBERS = ['03-1234-5678', '0120-999-999', '050-1111-2222'];
+const SCAM_DIGITS = SCAM_NUMBERS.map(scam => scam.replace(/[-]/g, ''));
+
+// 緊急通報番号
+const EMERGENCY_NUMBERS = new Set(['110', '119', '118']);
+
+// 発信者タイプ判定ルール（正規化済み番号の先頭一致）
+const PHONE_PREFIX_RULES = [
+  {
+    prefixes: ['033581', '035253'],
+    callerType: { type: '公的機関', category: '公的機関', confidence: '高' },
+    details: ['🏛️ 官公庁の番号パターン']
+  },
+  {
+    prefixes: ['0120', '0800'],
+    callerType: { type: '企業カスタマーサポート', category: '一般企業', confidence: '中' },
+    details: ['📞 フリーダイヤル（通話無料）']
+  },
+  {
+    prefixes: ['050'],
+    callerType: { type: 'IP電話利用者', category: '不明', confidence: '低' },
+    warnings: ['⚠️ IP電話は匿名性が高く、詐欺に悪用されやすい'],
+    riskLevel: '注意',
+    riskScore: 60
+  },
+  {
+    prefixes: ['090', '080', '070'],
+    callerType: { type: '個人携帯電話', category: '個人', confidence: '高' },
+    details: ['📱 個人契約の携帯電話']
+  },
+  {
+    prefixes: ['010'],
+    callerType: { type: '国際電話', category: '国際', confidence: '確実' },
+    warnings: ['🌍 国際電話 - 身に覚えがない場合は応答しない'],
+    riskLevel: '注意',
+    riskScore: 70
+  },
+  {
+    prefixes: ['0'],
+    callerType: { type: '固定電話', category: '企業または個人', confidence: '中' },
+    details: ['🏢 固定電話（企業または個人宅）']
+  }
+];
+
+// プレフィックス索引（最長一致で引けるよう長さの降順も保持）
+const buildPrefixIndex = (rules) => {
+  const byPrefix = new Map();
+  rules.forEach(rule => rule.prefixes.forEach(prefix => byPrefix.set(prefix, rule)));
+  const lengths = [...new Set([...byPrefix.keys()].map(p => p.length))].sort((a, b) => b - a);
+  return { byPrefix, lengths };
+};
+
+const PHONE_PREFIX_INDEX = buildPrefixIndex(PHONE_PREFIX_RULES);
+const INTERNATIONAL_RULE = PHONE_PREFIX_INDEX.byPrefix.get('010');
+
+const lookupPrefixRule = (normalized) => {
+  for (const length of PHONE_PREFIX_INDEX.lengths) {
+    const rule = PHONE_PREFIX_INDEX.byPrefix.get(normalized.slice(0, length));
+    if (rule) return rule;
+  }
+  return null;
+};
+
+// 発信頻度・出現頻度の集計設定（10分窓を1分バケットに分割）
+const VELOCITY_WINDOW_MS = 10 * 60 * 1000;
+const VELOCITY_BUCKETS = 10;
+const VELOCITY_PREFIX_LENGTH = 6;
+const VELOCITY_THRESHOLDS = { number: 5000, prefix: 20000, host: 1000 };
+const VELOCITY_STORAGE_KEY = 'scamPrevention.velocity.v1';
+const VELOCITY_SEEN_MESSAGES = 4096;
+const SKETCH_DEPTH = 4;
+const SKETCH_WIDTH = 2048;
+
+// FNV-1a（行ごとに seed を変える）
+const hashKey = (key, seed) => {
+  let h = (0x811c9dc5 ^ seed) >>> 0;
+  for (let i = 0; i < key.length; i++) {
+    h ^= key.charCodeAt(i);
+    h = Math.imul(h, 0x01000193);
+  }
+  return h >>> 0;
+};
+
+// メッセージ単位の64ビットダイジェスト（独立した2つの32ビットハッシュを連結）
+const messageDigest = (text) => {
+  let h1 = 0xdeadbeef;
+  let h2 = 0x41c6ce57;
+  for (let i = 0; i < text.length; i++) {
+    const c = text.charCodeAt(i);
+    h1 = Math.imul(h1 ^ c, 2654435761);
+    h2 = Math.imul(h2 ^ c, 1597334677);
+  }
+  h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+  h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+  return (h2 >>> 0).toString(16).padStart(8, '0') + (h1 >>> 0).toString(16).padStart(8, '0');
+};
+
+// 時間バケット付き Count-Min Sketch（メモリ固定・更新 O(1)）
+const createWindowedSketch = ({ windowMs = VELOCITY_WINDOW_MS, buckets = VELOCITY_BUCKETS, depth = SKETCH_DEPTH, width = SKETCH_WIDTH } = {}) => {
+  const bucketMs = windowMs / buckets;
+  const slotSize = depth * width;
+  const counts = new Uint32Array(buckets * slotSize);
+  const epochs = new Float64Array(buckets).fill(-1);
+
+  const currentSlot = (now) => {
+    const epoch = Math.floor(now / bucketMs);
+    const slot = epoch % buckets;
+    if (epochs[slot] !== epoch) {
+      counts.fill(0, slot * slotSize, (slot + 1) * slotSize);
+      epochs[slot] = epoch;
     }
-    // 固定電話
-    else if (normalized.startsWith('0')) {
-      callerType = { type: '固定電話', category: '企業または個人', confidence: '中' };
-      details.push('🏢 固定電話（企業または個人宅）');
+    return slot;
+  };
+
+  return {
+    add(key, now = Date.now(), amount = 1) {
+      const base = currentSlot(now) * slotSize;
+      for (let d = 0; d < depth; d++) {
+        const i = base + d * width + hashKey(key, d) % width;
+        counts[i] = Math.min(counts[i] + amount, 0xffffffff);
+      }
+    },
+    estimate(key, now = Date.now()) {
+      const oldest = Math.floor(now / bucketMs) - buckets;
+      let best = Infinity;
+      for (let d = 0; d < depth; d++) {
+        const column = hashKey(key, d) % width;
+        let total = 0;
+        for (let slot = 0; slot < buckets; slot++) {
+          if (epochs[slot] > oldest) total += counts[slot * slotSize + d * width + column];
+        }
+        best = Math.min(best, total);
+      }
+      return best;
+    },
+    snapshot() {
+      return { depth, width, buckets, bucketMs, epochs: Array.from(epochs), counts: encodeBase64(counts) };
+    },
+    restore(saved) {
+      if (!saved || saved.depth !== depth || saved.width !== width || saved.buckets !== buckets || saved.bucketMs !== bucketMs) return false;
+      epochs.set(saved.epochs);
+      counts.set(decodeBase64(saved.counts, counts.length));
+      return true;
+    }
+  };
+};
+
+const encodeBase64 = (typed) => {
+  const bytes = new Uint8Array(typed.buffer, typed.byteOffset, typed.byteLength);
+  let binary = '';
+  for (let i = 0; i < bytes.length; i += 0x8000) {
+    binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+  }
+  return btoa(binary);
+};
+
+const decodeBase64 = (text, length) => {
+  const binary = atob(text);
+  const bytes = new Uint8Array(length * 4);
+  for (let i = 0; i < bytes.length && i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+  return new Uint32Array(bytes.buffer);
+};
+
+// 番号・番号帯・ホストごとの頻度トラッカー
+const createVelocityTracker = () => {
+  const sketches = {
+    number: createWindowedSketch(),
+    prefix: createWindowedSketch(),
+    host: createWindowedSketch()
+  };
+  // 集計済みメッセージ（同じメールを何度チェックしても1通として数える）
+  const seenMessages = new Set();
+
+  return {
+    recordCall(normalized, now = Date.now()) {
+      sketches.number.add(normalized, now);
+      sketches.prefix.add(normalized.slice(0, VELOCITY_PREFIX_LENGTH), now);
+    },
+    recordMessageHosts(digest, hostnames, now = Date.now()) {
+      if (seenMessages.has(digest)) return;
+      seenMessages.add(digest);
+      if (seenMessages.size > VELOCITY_SEEN_MESSAGES) seenMessages.delete(seenMessages.values().next().value);
+      hostnames.forEach(hostname => sketches.host.add(hostname.toLowerCase(), now));
+    },
+    callSignals(normalized, now = Date.now()) {
+      return {
+        numberCalls: sketches.number.estimate(normalized, now),
+        prefixCalls: sketches.prefix.estimate(normalized.slice(0, VELOCITY_PREFIX_LENGTH), now)
+      };
+    },
+    hostSignal(hostname, now = Date.now()) {
+      return sketches.host.estimate(hostname.toLowerCase(), now);
+    },
+    save(storage = window.localStorage) {
+      const snapshot = {};
+      Object.keys(sketches).forEach(name => { snapshot[name] = sketches[name].snapshot(); });
+      snapshot.seenMessages = [...seenMessages];
+      try {
+        storage.setItem(VELOCITY_STORAGE_KEY, JSON.stringify(snapshot));
+      } catch (e) {
+        // 保存容量不足などは次回の保存で再試行する
+      }
+    },
+    load(storage = window.localStorage) {
+      try {
+        const snapshot = JSON.parse(storage.getItem(VELOCITY_STORAGE_KEY) || 'null');
+        if (snapshot) Object.keys(sketches).forEach(name => sketches[name].restore(snapshot[name]));
+        if (snapshot && Array.isArray(snapshot.seenMessages)) {
+          snapshot.seenMessages.slice(-VELOCITY_SEEN_MESSAGES).forEach(digest => seenMessages.add(digest));
+        }
+      } catch (e) {
+        // 壊れたスナップショットは破棄して空の状態から始める
+      }
     }
+  };
+};
 
-    // 既知の詐欺番号パターン
-    const scamNumbers = ['03-1234-5678', '0120-999-999', '050-1111-2222'];
-    if (scamNumbers.some(scam => number.includes(scam.replace(/[-]/g, '')))) {
+const normalizePhoneNumber = (number) => number.replace(/[-\s()]+/g, '');
+
+// 電話番号分析（tracker を渡すと発信頻度もスコアに反映する）
+const analyzePhoneNumber = (number, tracker = null) => {
+  const normalized = normalizePhoneNumber(number);
+  let riskLevel = '安全';
+  let riskScore = 10;
+  const warnings = [];
+  const details = [];
+  let callerType = { type: '不明', category: 'その他', confidence: '低' };
+
+  // 緊急番号チェック
+  if (EMERGENCY_NUMBERS.has(normalized)) {
+    callerType = { type: '緊急通報番号', category: '公的機関', confidence: '確実' };
+    riskLevel = '緊急';
+    details.push('✅ 緊急通報番号です');
+  } else {
+    const rule = number.startsWith('+') ? INTERNATIONAL_RULE : lookupPrefixRule(normalized);
+    if (rule) {
+      callerType = { ...rule.callerType };
+      if (rule.warnings) warnings.push(...rule.warnings);
+      if (rule.details) details.push(...rule.details);
+      if (rule.riskLevel) riskLevel = rule.riskLevel;
+      if (rule.riskScore) riskScore = rule.riskScore;
+    }
+  }
+
+  // 既知の詐欺番号パターン
+  if (SCAM_DIGITS.some(scam => number.includes(scam))) {
+    riskLevel = '危険';
+    riskScore = 95;
+    warnings.push('🚨 既知の詐欺電話番号です！絶対に応答しないでください');
+  }
+
+  // 発信頻度チェック
+  if (tracker) {
+    const { numberCalls, prefixCalls } = tracker.callSignals(normalized);
+    const windowMinutes = VELOCITY_WINDOW_MS / 60000;
+    if (numberCalls >= VELOCITY_THRESHOLDS.number) {
       riskLevel = '危険';
-      riskScore = 95;
-      warnings.push('🚨 既知の詐欺電話番号です！絶対に応答しないでください');
+      riskScore = Math.max(riskScore, 95);
+      warnings.push(`🚨 直近${windowMinutes}分間に約${numberCalls}件の発信があります`);
+    } else if (prefixCalls >= VELOCITY_THRESHOLDS.prefix) {
+      if (riskLevel === '安全') riskLevel = '注意';
+      riskScore = Math.max(riskScore, 70);
+      warnings.push(`⚠️ 同じ番号帯から直近${windowMinutes}分間に約${prefixCalls}件の発信があります`);
+    }
+    if (numberCalls > 0) details.push(`直近${windowMinutes}分間の発信数: 約${numberCalls}件`);
+  }
+
+  return { number, normalized, riskLevel, riskScore, warnings, details, callerType };
+};
+
+// レイテンシの対数ヒストグラム（件数によらずメモリ一定・分解能は約5%）
+const LATENCY_BASE_MS = 0.0001;
+const LATENCY_GROWTH = 1.05;
+const LATENCY_BUCKETS = 400;
+
+const createLatencyHistogram = () => {
+  const counts = new Float64Array(LATENCY_BUCKETS);
+  let count = 0;
+  return {
+    get count() { return count; },
+    record(ms) {
+      const bucket = ms <= LATENCY_BASE_MS ? 0 : Math.ceil(Math.log(ms / LATENCY_BASE_MS) / Math.log(LATENCY_GROWTH));
+      counts[Math.min(bucket, LATENCY_BUCKETS - 1)]++;
+      count++;
+    },
+    percentile(p) {
+      if (count === 0) return 0;
+      const target = Math.max(1, Math.ceil(p * count));
+      let seen = 0;
+      for (let bucket = 0; bucket < LATENCY_BUCKETS; bucket++) {
+        seen += counts[bucket];
+        if (seen >= target) return LATENCY_BASE_MS * Math.pow(LATENCY_GROWTH, bucket);
+      }
+      return LATENCY_BASE_MS * Math.pow(LATENCY_GROWTH, LATENCY_BUCKETS - 1);
+    }
+  };
+};
+
+// 着信スクリーニング（負荷に応じてバッチサイズを伸縮させるマイクロバッチ処理）
+// histogram を共有すれば、複数回に分けて呼んでも通算のパーセンタイルになる
+const screenCallerIds = async (callerIds, { tracker = null, log = null, histogram = createLatencyHistogram(), minBatch = 16, maxBatch = 1024, frameBudgetMs = 8, onBatch } = {}) => {
+  const verdicts = new Array(callerIds.length);
+  const startedAt = performance.now();
+  let batchSize = minBatch;
+  let cursor = 0;
+
+  while (cursor < callerIds.length) {
+    const batchStart = performance.now();
+    const end = Math.min(cursor + batchSize, callerIds.length);
+    for (let i = cursor; i < end; i++) {
+      if (tracker) tracker.recordCall(normalizePhoneNumber(callerIds[i]));
+      const result = analyzePhoneNumber(callerIds[i], tracker);
+      verdicts[i] = `${callerIds[i]}\t${result.riskLevel}\t${result.riskScore}`;
+      if (log) log.record(historyEntry('phone', callerIds[i], result));
+      histogram.record(performance.now() - batchStart);
+    }
+    const elapsed = performance.now() - batchStart;
+    batchSize = elapsed < frameBudgetMs / 2
+      ? Math.min(batchSize * 2, maxBatch)
+      : Math.max(minBatch, batchSize >> 1);
+    cursor = end;
+    if (onBatch) onBatch(cursor, callerIds.length);
+    // UIスレッドを塞がないようバッチごとに制御を返す
+    await new Promise(resolve => setTimeout(resolve, 0));
+  }
+
+  return {
+    verdicts,
+    stats: {
+      count: histogram.count,
+      totalMs: performance.now() - startedAt,
+      p50: histogram.percentile(0.5),
+      p99: histogram.percentile(0.99),
+      p999: histogram.percentile(0.999)
+    }
+  };
+};
+
+// ファイルを少しずつ読み、空行を除いた行の配列を順に返す
+async function* readLineChunks(file, onBytes) {
+  const reader = file.stream().pipeThrough(new TextDecoderStream()).getReader();
+  let remainder = '';
+  let bytes = 0;
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    bytes += value.length;
+    const lines = (remainder + value).split(/\r?\n/);
+    remainder = lines.pop();
+    if (onBytes) onBytes(Math.min(bytes, file.size));
+    const callerIds = lines.map(line => line.trim()).filter(Boolean);
+    if (callerIds.length > 0) yield callerIds;
+  }
+  if (remainder.trim()) yield [remainder.trim()];
+}
+
+// 負荷テスト用の合成コーパス（シード固定で再現可能）
+const CORPUS_KINDS = ['phone', 'url', 'email'];
+const CORPUS_CAMPAIGN_POOL = 64;
+const CORPUS_LEGIT_PHONE_PREFIXES = ['03', '06', '045', '052', '0120', '090', '080'];
+const CORPUS_SCAM_PHONE_PREFIXES = ['050', '+1-876', '+234', '+675', '010-44'];
+const CORPUS_EMAIL_EN = {
+  phishing: [
+    { subject: 'Your account has been suspended', content: 'We detected unusual sign-in activity. Verify account ownership using the link below.' },
+    { subject: 'Payment declined', content: 'Your last payment could not be processed. Update your billing details to avoid interruption.' },
+    { subject: 'Package delivery failed', content: 'We could not deliver your parcel. Confirm your address and pay the redelivery fee below.' }
+  ],
+  legit: [
+    { subject: 'Your order has shipped', content: 'Your order is on its way. You can track it from the orders page in the app.' },
+    { subject: 'New sign-in to your account', content: 'If this was you, no action is needed. Otherwise change your password from the app settings.' }
+  ]
+};
+const CORPUS_URGENCY_EN = ['', 'Act immediately. ', 'Urgent action required within 24 hours. '];
+const CORPUS_DEFAULT_COUNT = 1000000;
+// 保存先を選べないブラウザではダウンロード前に全体をメモリへ組み立てるため件数を抑える
+const CORPUS_BUFFERED_COUNT = 100000;
+const FULLWIDTH_OFFSET = 0xfee0;
+
+const digits = (random, length) => {
+  let text = '';
+  for (let i = 0; i < length; i++) text += Math.floor(random() * 10);
+  return text;
+};
+
+// 難読化（1: 区切り文字の揺れ、2: 全角文字やゼロ幅スペースの混入）
+const toFullwidth = (text) => text.replace(/[0-9A-Za-z]/g, c => String.fromCharCode(c.charCodeAt(0) + FULLWIDTH_OFFSET));
+
+const obfuscatePhone = (random, number, level) => {
+  if (level === 0) return number;
+  const separator = pickOne(random, ['-', ' ', '.', '']);
+  const varied = number.replace(/-/g, separator);
+  return level >= 2 && random() < 0.5 ? toFullwidth(varied) : varied;
+};
+
+const obfuscateUrl = (random, url, level) => {
+  if (level === 0) return url;
+  const parsed = new URL(url);
+  if (level >= 2 && random() < 0.3) return `${parsed.protocol}//${pickOne(random, ['secure', 'account', 'www.google.com'])}@${parsed.host}${parsed.pathname}`;
+  return random() < 0.5 ? url.replace(parsed.hostname, parsed.hostname.toUpperCase()) : `${url}?session=${digits(random, 8)}`;
+};
+
+const obfuscateText = (random, text, level) => {
+  if (level < 2) return text;
+  return text.replace(/(確認|更新|verify|account|password)/gi, word => (random() < 0.5 ? word.split('').join('\u200b') : word));
+};
+
+const generatePhoneRecord = (random, phishing) => {
+  if (phishing && random() < 0.2) return pickOne(random, SCAM_NUMBERS);
+  const prefix = pickOne(random, phishing ? CORPUS_SCAM_PHONE_PREFIXES : CORPUS_LEGIT_PHONE_PREFIXES);
+  return `${prefix}-${digits(random, 4)}-${digits(random, 4)}`;
+};
+
+const generateUrlRecord = (random, phishing, brand) => {
+  if (phishing) return phishingUrl(random, brand, pickOne(random, QUIZ_DIFFICULTIES));
+  return `https://www.${brand.domain}/${pickOne(random, ['', 'orders', 'help', 'account/settings'])}`;
+};
+
+const generateEmailRecord = (random, phishing, category, lang) => {
+  const brand = pickOne(random, QUIZ_BRANDS[category]);
+  const url = generateUrlRecord(random, phishing, brand);
+  if (lang === 'ja') {
+    const text = (phishing ? QUIZ_PHISHING_TEXT : QUIZ_LEGIT_TEXT)[category];
+    const urgency = phishing ? pickOne(random, QUIZ_URGENCY) : '';
+    return {
+      subject: `【${brand.name}】${text.subject}`,
+      content: `${text.content}${urgency ? `\n${urgency}手続きしてください。` : ''}\n→ ${url}`
+    };
+  }
+  const text = pickOne(random, CORPUS_EMAIL_EN[phishing ? 'phishing' : 'legit']);
+  const urgency = phishing ? pickOne(random, CORPUS_URGENCY_EN) : '';
+  return { subject: `[${brand.slug}] ${text.subject}`, content: `${urgency}${text.content}\n${url}` };
+};
+
+// レコードを1件ずつ生成する（全件をメモリに載せない）
+function* generateCorpus({ seed = 1, count = CORPUS_DEFAULT_COUNT, phishingRatio = 0.3, obfuscation = 0, duplicateRate = 0.1 } = {}) {
+  const random = createRandom(seed);
+  const campaigns = [];
+  for (let id = 0; id < count; id++) {
+    const phishing = random() < phishingRatio;
+    // 同一キャンペーンの使い回し（難読化だけ変えて再送）
+    if (phishing && campaigns.length > 0 && random() < duplicateRate) {
+      const base = pickOne(random, campaigns);
+      const record = { ...base, id };
+      if (record.kind === 'phone') record.value = obfuscatePhone(random, base.raw, obfuscation);
+      else if (record.kind === 'url') record.value = obfuscateUrl(random, base.raw, obfuscation);
+      else record.content = obfuscateText(random, base.raw, obfuscation);
+      delete record.raw;
+      yield record;
+      continue;
+    }
+
+    const kind = pickOne(random, CORPUS_KINDS);
+    const category = pickOne(random, QUIZ_CATEGORIES);
+    const label = phishing ? 'phishing' : 'legit';
+    // 正規のレコードには区切り文字などの無害な揺れだけを加える（回避手口は詐欺側だけ）
+    const level = phishing ? obfuscation : Math.min(obfuscation, 1);
+    let record;
+    if (kind === 'phone') {
+      const raw = generatePhoneRecord(random, phishing);
+      record = { id, kind, label, value: obfuscatePhone(random, raw, level), raw };
+    } else if (kind === 'url') {
+      const raw = generateUrlRecord(random, phishing, pickOne(random, QUIZ_BRANDS[category]));
+      record = { id, kind, label, category, value: obfuscateUrl(random, raw, level), raw };
+    } else {
+      const lang = random() < 0.6 ? 'ja' : 'en';
+      const { subject, content } = generateEmailRecord(random, phishing, category, lang);
+      record = { id, kind, label, category, lang, subject, content: obfuscateText(random, content, level), raw: content };
+    }
+    if (phishing) {
+      record.campaign = id;
+      if (campaigns.length < CORPUS_CAMPAIGN_POOL) campaigns.push(record);
+      else campaigns[Math.floor(random() * CORPUS_CAMPAIGN_POOL)] = record;
+    }
+    const { raw, ...output } = record;
+    yield output;
+  }
+}
+
+// gzip 圧縮した JSONL を書き出す（write の待機で背圧を受け、メモリはチャンク分だけ）
+const writeCorpusJsonl = async (records, writable, { chunkChars = 1 << 20, onProgress } = {}) => {
+  const encoder = new TextEncoder();
+  const gzip = new CompressionStream('gzip');
+  const piping = gzip.readable.pipeTo(writable);
+  const writer = gzip.writable.getWriter();
+  let buffer = '';
+  let written = 0;
+  for (const record of records) {
+    buffer += JSON.stringify(record) + '\n';
+    written++;
+    if (buffer.length >= chunkChars) {
+      await writer.write(encoder.encode(buffer));
+      buffer = '';
+      if (onProgress) onProgress(written);
+      // 進捗表示のためチャンクごとに制御を返す
+      await new Promise(resolve => setTimeout(resolve, 0));
+    }
+  }
+  if (buffer) await writer.write(encoder.encode(buffer));
+  await writer.close();
+  await piping;
+  if (onProgress) onProgress(written);
+  return written;
+};
+
+// メールヘッダー解析（生のヘッダーを一度だけ解析して必要な項目だけ保持する）
+const EMAIL_HEADER_NAME = /^[!-9;-~]+$/;
+const EMAIL_KEY_HEADERS = ['from', 'received', 'authentication-results'];
+const SUSPICIOUS_TLDS = new Set(['xyz', 'top', 'click', 'buzz', 'icu', 'work', 'shop']);
+const FREEMAIL_DOMAINS = new Set(['gmail.com', 'yahoo.co.jp', 'outlook.com', 'hotmail.com', 'icloud.com']);
+const RECEIVED_HOP_LIMIT = 8;
+const SENDER_DOMAIN_CACHE_SIZE = 10000;
+const ALL_BRANDS = Object.values(QUIZ_BRANDS).flat();
+// ブランドごとの公式ドメイン（サブドメインも公式として扱う）。クイズの出題用ドメインとは別に管理する
+const BRAND_OFFICIAL_DOMAINS = {
+  apple: ['apple.com', 'icloud.com'],
+  google: ['google.com', 'google.co.jp'],
+  microsoft: ['microsoft.com', 'live.com', 'outlook.com', 'office.com'],
+  line: ['line.me', 'line.biz', 'linecorp.com', 'line-apps.com'],
+  amazon: ['amazon.co.jp', 'amazon.com', 'amazon.jp'],
+  rakuten: ['rakuten.co.jp', 'rakuten.com', 'rakuten.ne.jp', 'rakuten-card.co.jp', 'rakuten-bank.co.jp', 'rakuten-sec.co.jp'],
+  mercari: ['mercari.com', 'mercari.jp'],
+  yamato: ['kuronekoyamato.co.jp', 'yamato-hd.co.jp'],
+  sagawa: ['sagawa-exp.co.jp'],
+  japanpost: ['japanpost.jp'],
+  smbc: ['smbc.co.jp', 'smbc-card.com', 'smfg.co.jp'],
+  mufg: ['mufg.jp'],
+  mizuho: ['mizuhobank.co.jp', 'mizuho-fg.co.jp', 'mizuho-sc.com']
+};
+
+// RFC 2047 のエンコード語（=?UTF-8?B?...?= など）を復号
+const decodeEncodedWords = (text) => text.replace(/=\?([^?]+)\?([BbQq])\?([^?]*)\?=/g, (word, charset, encoding, data) => {
+  try {
+    const binary = encoding.toUpperCase() === 'B'
+      ? atob(data)
+      : data.replace(/_/g, ' ').replace(/=([0-9A-Fa-f]{2})/g, (m, hex) => String.fromCharCode(parseInt(hex, 16)));
+    const bytes = Uint8Array.from(binary, c => c.charCodeAt(0));
+    return new TextDecoder(charset).decode(bytes);
+  } catch (e) {
+    return word;
+  }
+});
+
+const parseAddress = (value) => {
+  if (!value) return null;
+  const decoded = decodeEncodedWords(value).trim();
+  const angle = decoded.match(/^(.*)<([^<>]+)>\s*$/);
+  const address = (angle ? angle[2] : decoded).trim().toLowerCase();
+  const name = angle ? angle[1].trim().replace(/^"|"$/g, '') : '';
+  const at = address.lastIndexOf('@');
+  return { name, address, domain: at === -1 ? '' : address.slice(at + 1) };
+};
+
+const parseReceived = (value) => {
+  const from = value.match(/\bfrom\s+(\S+)/i);
+  const by = value.match(/\bby\s+(\S+)/i);
+  return { from: from ? from[1].toLowerCase() : '', by: by ? by[1].toLowerCase() : '' };
+};
+
+// 先頭のヘッダーブロックを解析し、本文と分ける（ヘッダーがなければ全体が本文）
+const parseEmailMessage = (raw) => {
+  const fields = new Map();
+  let current = null;
+  let pos = 0;
+  while (pos < raw.length) {
+    let next = raw.indexOf('\n', pos);
+    if (next === -1) next = raw.length;
+    const line = raw.slice(pos, next).replace(/\r$/, '');
+    pos = next + 1;
+    if (line === '') break;
+    if ((line[0] === ' ' || line[0] === '\t') && current) {
+      current.value += ' ' + line.trim();
+      continue;
+    }
+    const colon = line.indexOf(':');
+    if (colon <= 0 || !EMAIL_HEADER_NAME.test(line.slice(0, colon))) return { headers: null, body: raw };
+    const name = line.slice(0, colon).toLowerCase();
+    current = { value: line.slice(colon + 1).trim() };
+    if (!fields.has(name)) fields.set(name, []);
+    fields.get(name).push(current);
+  }
+  if (!EMAIL_KEY_HEADERS.some(name => fields.has(name))) return { headers: null, body: raw };
+
+  const first = (name) => (fields.has(name) ? fields.get(name)[0].value : '');
+  const auth = {};
+  (fields.get('authentication-results') || []).slice(0, 1).forEach(({ value }) => {
+    const pattern = /\b(spf|dkim|dmarc)=(\w+)/gi;
+    let match;
+    while ((match = pattern.exec(value)) !== null) {
+      const method = match[1].toLowerCase();
+      if (!auth[method]) auth[method] = match[2].toLowerCase();
+    }
+  });
+  const headers = {
+    from: parseAddress(first('from')),
+    replyTo: parseAddress(first('reply-to')),
+    returnPath: parseAddress(first('return-path')),
+    subject: decodeEncodedWords(first('subject')),
+    received: (fields.get('received') || []).map(({ value }) => parseReceived(value)),
+    auth
+  };
+  return { headers, body: pos >= raw.length ? '' : raw.slice(pos) };
+};
+
+// 英字は単語単位、日本語のブランド名は部分一致で判定
+const mentionsBrand = (text, brand) => {
+  const tokens = text.toLowerCase().split(/[^a-z0-9]+/);
+  return tokens.includes(brand.slug) || (/[^\x00-\x7f]/.test(brand.name) && text.includes(brand.name));
+};
+
+const isOfficialDomain = (domain, brand) => (BRAND_OFFICIAL_DOMAINS[brand.slug] || [brand.domain])
+  .some(official => domain === official || domain.endsWith(`.${official}`));
+
+const sameSite = (a, b) => a === b || a.endsWith(`.${b}`) || b.endsWith(`.${a}`);
+
+// 送信元ドメイン単位の判定（メッセージに依存しないのでキャッシュする）
+const senderDomainCache = new Map();
+
+const senderDomainVerdict = (domain) => {
+  const cached = senderDomainCache.get(domain);
+  if (cached) {
+    senderDomainCache.delete(domain);
+    senderDomainCache.set(domain, cached);
+    return cached;
+  }
+  const verdict = {
+    lookalikeOf: ALL_BRANDS.find(brand => mentionsBrand(domain, brand) && !isOfficialDomain(domain, brand)) || null,
+    suspiciousTld: SUSPICIOUS_TLDS.has(domain.slice(domain.lastIndexOf('.') + 1)),
+    freemail: FREEMAIL_DOMAINS.has(domain)
+  };
+  senderDomainCache.set(domain, verdict);
+  if (senderDomainCache.size > SENDER_DOMAIN_CACHE_SIZE) senderDomainCache.delete(senderDomainCache.keys().next().value);
+  return verdict;
+};
+
+const analyzeEmailHeaders = (headers) => {
+  let riskScore = 0;
+  const warnings = [];
+  const details = [];
+  const flag = (score, message) => {
+    riskScore = Math.max(riskScore, score);
+    warnings.push(message);
+  };
+  const { from, replyTo, returnPath, received, auth } = headers;
+
+  if (from && from.domain) {
+    details.push(`送信元: ${from.name ? `${from.name} ` : ''}<${from.address}>`);
+    const domainVerdict = senderDomainVerdict(from.domain);
+    if (domainVerdict.lookalikeOf) flag(85, `🚨 送信元ドメインが${domainVerdict.lookalikeOf.name}を装っています: ${from.domain}`);
+    if (domainVerdict.suspiciousTld) flag(60, `⚠️ 不審なトップレベルドメインからの送信です: ${from.domain}`);
+
+    // 表示名と実際の送信元の食い違い
+    const nameAddress = from.name.match(/[\w.+-]+@([\w-]+(?:\.[\w-]+)+)/);
+    if (nameAddress && nameAddress[1].toLowerCase() !== from.domain) {
+      flag(90, `🚨 表示名のアドレス（${nameAddress[0]}）と実際の送信元が異なります`);
+    }
+    const claimed = ALL_BRANDS.find(brand => mentionsBrand(from.name, brand));
+    if (claimed && !isOfficialDomain(from.domain, claimed)) {
+      flag(domainVerdict.freemail ? 90 : 80, `🚨 表示名は「${claimed.name}」ですが、公式ドメインからの送信ではありません`);
+    }
+
+    if (replyTo && replyTo.domain && !sameSite(replyTo.domain, from.domain)) {
+      flag(60, `⚠️ 返信先（${replyTo.domain}）が送信元と異なります`);
+    }
+    if (returnPath && returnPath.domain && returnPath.domain !== from.domain && !returnPath.domain.endsWith(`.${from.domain}`)) {
+      details.push(`Return-Path のドメイン: ${returnPath.domain}`);
     }
+  }
+
+  // 送信ドメイン認証（SPF / DKIM / DMARC）
+  const authSummary = ['spf', 'dkim', 'dmarc'].filter(m => auth[m]).map(m => `${m.toUpperCase()}=${auth[m]}`);
+  if (authSummary.length > 0) details.push(`認証結果: ${authSummary.join(', ')}`);
+  if (auth.dmarc === 'fail') flag(90, '🚨 DMARC認証に失敗しています（なりすましの可能性）');
+  if (auth.spf === 'fail' || auth.spf === 'softfail') flag(70, '⚠️ SPF認証に失敗しています');
+  if (auth.dkim === 'fail') flag(70, '⚠️ DKIM署名の検証に失敗しています');
+
+  // 中継経路
+  if (received.length > 0) details.push(`中継サーバー数: ${received.length}`);
+  if (received.length > RECEIVED_HOP_LIMIT) flag(50, `⚠️ 中継回数が多すぎます（${received.length}回）`);
+  // 最初の中継（末尾の Received）は送信者の端末からの投稿なので、IPアドレスだけでも普通にある
+  const relays = received.slice(0, -1);
+  if (received.some(hop => hop.from === 'unknown') || relays.some(hop => /^\[?\d{1,3}(\.\d{1,3}){3}\]?$/.test(hop.from))) {
+    flag(50, '⚠️ 送信元ホスト名のない中継サーバーを経由しています');
+  }
+
+  return { riskScore, warnings, details };
+};
+
+// HTMLメール本文の解析（DOMを作らず先頭から1回走査する）
+const HTML_HINT = /<(?:html|body|div|p|a|table|span|br|font)\b/i;
+const HTML_VOID_TAGS = new Set(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'wbr']);
+const HTML_RAW_TEXT_TAGS = new Set(['script', 'style', 'textarea', 'title']);
+const HTML_HIDDEN_TAGS = new Set(['head', 'template', 'noscript']);
+const HTML_HIDDEN_STYLE = /display\s*:\s*none|visibility\s*:\s*hidden|font-size\s*:\s*0(?![.\d])|opacity\s*:\s*0(?![.\d])|max-height\s*:\s*0(?![.\d])/i;
+const HTML_ATTRIBUTE = /([^\s=\/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?/g;
+const HTML_ENTITIES = { amp: '&', lt: '<', gt: '>', quot: '"', apos: "'", nbsp: ' ' };
+const HTML_MAX_DEPTH = 512;
+const HTML_MAX_TEXT_CHARS = 1000000;
+const HTML_MAX_ANCHORS = 1000;
+const HTML_MAX_ANCHOR_TEXT = 200;
+
+const decodeHtmlEntities = (text) => text.replace(/&(#x[0-9a-f]+|#\d+|[a-z]+);/gi, (entity, code) => {
+  if (code[0] === '#') {
+    const point = code[1] === 'x' || code[1] === 'X' ? parseInt(code.slice(2), 16) : parseInt(code.slice(1), 10);
+    return point > 0 && point <= 0x10ffff ? String.fromCodePoint(point) : entity;
+  }
+  return HTML_ENTITIES[code.toLowerCase()] || entity;
+});
+
+const parseHtmlAttributes = (source) => {
+  const attributes = {};
+  HTML_ATTRIBUTE.lastIndex = 0;
+  let match;
+  while ((match = HTML_ATTRIBUTE.exec(source)) !== null) {
+    const value = match[2] !== undefined ? match[2] : match[3] !== undefined ? match[3] : match[4];
+    attributes[match[1].toLowerCase()] = value === undefined ? '' : decodeHtmlEntities(value);
+  }
+  return attributes;
+};
+
+// タグの終わりを探す。引用符は '=' の直後に置かれた属性値の囲みとしてだけ扱う
+// （title=it's のような引用符なしの値の中の ' で読み違えない）
+const findTagEnd = (html, from) => {
+  let i = from;
+  while (i < html.length) {
+    const c = html[i];
+    if (c === '>') return i;
+    if (c !== '=') {
+      i++;
+      continue;
+    }
+    i++;
+    while (i < html.length && /\s/.test(html[i])) i++;
+    const quote = html[i];
+    if (quote === '"' || quote === "'") {
+      const close = html.indexOf(quote, i + 1);
+      if (close === -1) return -1;
+      i = close + 1;
+    }
+  }
+  return -1;
+};
 
-    return { number, normalized, riskLevel, riskScore, warnings, details, callerType };
+// 表示されるテキストと、リンク（href と表示テキストの組）を取り出す
+const extractHtmlContent = (html) => {
+  const textParts = [];
+  const anchors = [];
+  const stack = [];
+  let textChars = 0;
+  let hiddenChars = 0;
+  let hiddenDepth = 0;
+  let anchor = null;
+  let truncated = false;
+  let strictTags = true;
+  let lastChar = ' ';
+  let pos = 0;
+
+  const addText = (raw) => {
+    const collapsed = decodeHtmlEntities(raw).replace(/\s+/g, ' ');
+    const text = lastChar === ' ' ? collapsed.replace(/^ /, '') : collapsed;
+    if (text === '') return;
+    if (hiddenDepth > 0) {
+      if (text !== ' ') hiddenChars += text.length;
+      // 非表示のリンクも表示テキストと飛び先を比べられるよう、リンク内の文字だけは残す
+      if (anchor && anchor.hidden && anchor.text.length < HTML_MAX_ANCHOR_TEXT) anchor.text = (anchor.text + text).slice(0, HTML_MAX_ANCHOR_TEXT);
+      return;
+    }
+    if (anchor && anchor.text.length < HTML_MAX_ANCHOR_TEXT) anchor.text = (anchor.text + text).slice(0, HTML_MAX_ANCHOR_TEXT);
+    if (textChars + text.length > HTML_MAX_TEXT_CHARS) {
+      truncated = true;
+      return;
+    }
+    textParts.push(text);
+    textChars += text.length;
+    lastChar = text[text.length - 1];
+  };
+
+  const closeAnchor = () => {
+    if (!anchor) return;
+    anchor.text = anchor.text.trim();
+    if (anchors.length < HTML_MAX_ANCHORS) anchors.push(anchor);
+    else truncated = true;
+    anchor = null;
+  };
+
+  while (pos < html.length) {
+    const open = html.indexOf('<', pos);
+    if (open === -1) {
+      addText(html.slice(pos));
+      break;
+    }
+    if (open > pos) addText(html.slice(pos, open));
+
+    // コメント・DOCTYPE など
+    if (html.startsWith('<!--', open)) {
+      const end = html.indexOf('-->', open + 4);
+      pos = end === -1 ? html.length : end + 3;
+      continue;
+    }
+    if (html[open + 1] === '!' || html[open + 1] === '?') {
+      const end = html.indexOf('>', open);
+      pos = end === -1 ? html.length : end + 1;
+      continue;
+    }
+
+    const nameMatch = /^<(\/?)([a-zA-Z][a-zA-Z0-9-]*)/.exec(html.slice(open, open + 64));
+    if (!nameMatch) {
+      addText('<');
+      pos = open + 1;
+      continue;
+    }
+    // 引用符が閉じていない壊れたタグが出たら、以降は引用符を無視して次の '>' で区切る（走査を線形に保つ）
+    let end = strictTags ? findTagEnd(html, open + nameMatch[0].length) : -1;
+    if (end === -1) {
+      strictTags = false;
+      end = html.indexOf('>', open + nameMatch[0].length);
+    }
+    if (end === -1) {
+      addText(html.slice(open));
+      break;
+    }
+    const closing = nameMatch[1] === '/';
+    const name = nameMatch[2].toLowerCase();
+    pos = end + 1;
+
+    if (closing) {
+      if (name === 'a') closeAnchor();
+      for (let i = stack.length - 1; i >= 0; i--) {
+        if (stack[i].name !== name) continue;
+        stack.splice(i).forEach(element => { if (element.hidden) hiddenDepth--; });
+        break;
+      }
+      addText(' ');
+      continue;
+    }
+
+    const source = html.slice(open + nameMatch[0].length, end);
+    const attributes = parseHtmlAttributes(source);
+    const hidden = HTML_HIDDEN_TAGS.has(name) || 'hidden' in attributes || HTML_HIDDEN_STYLE.test(attributes.style || '');
+
+    // script / style などは閉じタグまで読み飛ばす
+    if (HTML_RAW_TEXT_TAGS.has(name)) {
+      const closer = new RegExp(`</${name}\\s*>`, 'gi');
+      closer.lastIndex = pos;
+      const match = closer.exec(html);
+      const rawEnd = match ? match.index : html.length;
+      if (name === 'textarea' && !hidden) addText(html.slice(pos, rawEnd));
+      else hiddenChars += rawEnd - pos;
+      pos = match ? closer.lastIndex : html.length;
+      continue;
+    }
+
+    if (name === 'a') {
+      closeAnchor();
+      if (attributes.href !== undefined) anchor = { href: attributes.href.trim(), text: '', hidden: hidden || hiddenDepth > 0 };
+    }
+    if (!HTML_VOID_TAGS.has(name) && !source.trim().endsWith('/') && stack.length < HTML_MAX_DEPTH) {
+      stack.push({ name, hidden });
+      if (hidden) hiddenDepth++;
+    }
+    if (name === 'br' || name === 'p' || name === 'div' || name === 'td' || name === 'li') addText(' ');
+  }
+  closeAnchor();
+
+  return { text: textParts.join('').trim(), anchors, hiddenChars, truncated };
+};
+
+// 表示テキストをホスト名とみなす TLD（invoice.pdf や README.md のようなファイル名と区別する）
+const LINK_TEXT_TLDS = new Set(['com', 'net', 'org', 'jp', 'info', 'biz', 'io', 'co', 'me', 'app', 'dev', 'us', 'uk', 'cn', 'kr', 'tw', 'hk', 'ru', ...SUSPICIOUS_TLDS]);
+
+// スキーム・www.・パスのいずれかがあるか、末尾がよく使われる TLD のときだけホスト名として扱う
+const linkHost = (text) => {
+  const match = /^(https?:\/\/)?((?:[a-z0-9-]+\.)+([a-z]{2,}))([\/:?#]\S*)?$/i.exec(text.trim());
+  if (!match) return null;
+  const host = match[2].toLowerCase();
+  if (!match[1] && !match[4] && !host.startsWith('www.') && !LINK_TEXT_TLDS.has(match[3].toLowerCase())) return null;
+  return host.replace(/^www\./, '');
+};
+
+const anchorTargetHost = (href) => {
+  let target;
+  try {
+    target = new URL(href);
+  } catch (e) {
+    return null;
+  }
+  if (target.protocol !== 'http:' && target.protocol !== 'https:') return null;
+  return target.hostname.toLowerCase().replace(/^www\./, '');
+};
+
+// 表示テキストとリンク先の食い違い（非表示のリンクは、表示されているリンクと別のサイトを指していないかも見る）
+const findLinkMismatches = (anchors) => {
+  const mismatches = [];
+  const visibleHosts = anchors.filter(anchor => !anchor.hidden).map(anchor => anchorTargetHost(anchor.href)).filter(Boolean);
+  anchors.forEach(({ href, text, hidden }) => {
+    const targetHost = anchorTargetHost(href);
+    if (!targetHost) return;
+    const shownHost = linkHost(text);
+    if (shownHost && !sameSite(shownHost, targetHost)) {
+      mismatches.push({ shown: shownHost, target: targetHost, hidden });
+      return;
+    }
+    const brand = !shownHost && ALL_BRANDS.find(b => mentionsBrand(text, b));
+    if (brand && !isOfficialDomain(targetHost, brand)) {
+      mismatches.push({ shown: brand.name, target: targetHost, hidden });
+      return;
+    }
+    if (hidden && visibleHosts.length > 0 && !visibleHosts.some(host => sameSite(host, targetHost))) {
+      mismatches.push({ shown: null, target: targetHost, hidden });
+    }
+  });
+  return mismatches;
+};
+
+// 相関グラフ（番号・ドメイン・メールを整数IDのノードで結び、CSR形式で辺を持つ）
+const GRAPH_PROPAGATION_ITERATIONS = 4;
+const GRAPH_PROPAGATION_DAMPING = 0.7;
+const GRAPH_RISK_THRESHOLD = 0.4;
+const GRAPH_NODE_LABELS = { phone: '電話番号', host: 'ドメイン', mail: 'メール' };
+const GRAPH_UNREACHED = 255;
+const GRAPH_COMPACT_MIN_PENDING = 1024;
+const EMAIL_PHONE_PATTERN = /(?:\+\d{1,3}[-\s]?)?\(?0?\d{1,4}\)?[-\s]\d{1,4}[-\s]\d{3,4}(?!\d)/g;
+// 日付や金額の数字の並びを除き、国内（0始まり10〜11桁）か国際（+始まり）の番号だけを残す
+const PHONE_NUMBER_SHAPE = /^(?:0\d{9,10}|\+\d{10,13})$/;
+
+const extractPhoneNumbers = (text) => [...new Set((text.match(EMAIL_PHONE_PATTERN) || [])
+  .map(normalizePhoneNumber)
+  .filter(number => PHONE_NUMBER_SHAPE.test(number)))];
+
+const graphNodeValue = (type, value) => (type === 'phone'
+  ? normalizePhoneNumber(value)
+  : type === 'host' ? value.toLowerCase().replace(/^www\./, '') : value);
+
+// 危険度は既知の危険ノードからのホップ数で持ち、辺や既知ノードが増えたところから差分で広げる
+// （辺も既知ノードも増えるだけなので、ホップ数は減る方向にしか変わらない）
+const createCorrelationGraph = () => {
+  const ids = new Map();
+  const keys = [];
+  let known = new Uint8Array(1024);
+  let hops = new Uint8Array(1024).fill(GRAPH_UNREACHED);
+  // しきい値以上に危険度が伝わったノード（既知のものは除く）
+  const propagated = new Set();
+  // 確定済みの辺（CSR）と、次の圧縮までに追加された辺（ノードごとの隣接リスト）
+  let offsets = new Int32Array(1);
+  let targets = new Int32Array(0);
+  let pending = new Map();
+  let pendingCount = 0;
+  let edgeCount = 0;
+  let compactTimer = null;
+
+  const lookup = (type, value) => ids.get(`${type}:${graphNodeValue(type, value)}`);
+
+  const nodeId = (type, value) => {
+    const key = `${type}:${graphNodeValue(type, value)}`;
+    let id = ids.get(key);
+    if (id === undefined) {
+      id = keys.length;
+      ids.set(key, id);
+      keys.push(key);
+      if (id >= known.length) {
+        const nextKnown = new Uint8Array(known.length * 2);
+        nextKnown.set(known);
+        known = nextKnown;
+        const nextHops = new Uint8Array(hops.length * 2).fill(GRAPH_UNREACHED);
+        nextHops.set(hops);
+        hops = nextHops;
+      }
+    }
+    return id;
+  };
+
+  const compactedDegree = (v) => (v < offsets.length - 1 ? offsets[v + 1] - offsets[v] : 0);
+  const degree = (v) => compactedDegree(v) + (pending.has(v) ? pending.get(v).length : 0);
+
+  const forEachNeighbor = (v, fn) => {
+    if (v < offsets.length - 1) {
+      for (let e = offsets[v]; e < offsets[v + 1]; e++) fn(targets[e]);
+    }
+    const extra = pending.get(v);
+    if (extra) extra.forEach(fn);
+  };
+
+  // 次数の小さい側の隣接だけを調べる（メールのノードは辺が少ない）
+  const hasEdge = (a, b) => {
+    const [from, to] = degree(a) <= degree(b) ? [a, b] : [b, a];
+    if (from < offsets.length - 1) {
+      for (let e = offsets[from]; e < offsets[from + 1]; e++) {
+        if (targets[e] === to) return true;
+      }
+    }
+    const extra = pending.get(from);
+    return extra ? extra.includes(to) : false;
+  };
+
+  const addPending = (from, to) => {
+    const list = pending.get(from);
+    if (list) list.push(to);
+    else pending.set(from, [to]);
+  };
+
+  // 既存のCSRと追加分を数え上げソートでまとめ直す（O(ノード数 + 辺数)・クリック処理の外で実行）
+  const compact = () => {
+    clearTimeout(compactTimer);
+    compactTimer = null;
+    if (pendingCount === 0) return;
+    const n = keys.length;
+    const nextOffsets = new Int32Array(n + 1);
+    for (let v = 0; v < n; v++) nextOffsets[v + 1] = nextOffsets[v] + degree(v);
+    const nextTargets = new Int32Array(nextOffsets[n]);
+    const cursor = nextOffsets.slice(0, n);
+    for (let v = 0; v < offsets.length - 1; v++) {
+      for (let e = offsets[v]; e < offsets[v + 1]; e++) nextTargets[cursor[v]++] = targets[e];
+    }
+    pending.forEach((list, v) => list.forEach(w => { nextTargets[cursor[v]++] = w; }));
+    offsets = nextOffsets;
+    targets = nextTargets;
+    pending = new Map();
+    pendingCount = 0;
+  };
+
+  // ホップ数が縮んだノードから、1ホップずつ外側へ伝える
+  const reach = (v, distance) => {
+    hops[v] = distance;
+    if (!known[v] && GRAPH_PROPAGATION_DAMPING ** distance >= GRAPH_RISK_THRESHOLD) propagated.add(v);
+    const queue = [v];
+    for (let head = 0; head < queue.length; head++) {
+      const next = hops[queue[head]] + 1;
+      if (next > GRAPH_PROPAGATION_ITERATIONS) continue;
+      forEachNeighbor(queue[head], w => {
+        if (next >= hops[w]) return;
+        hops[w] = next;
+        if (!known[w] && GRAPH_PROPAGATION_DAMPING ** next >= GRAPH_RISK_THRESHOLD) propagated.add(w);
+        queue.push(w);
+      });
+    }
+  };
+
+  const riskOfId = (id) => (hops[id] === GRAPH_UNREACHED ? 0 : GRAPH_PROPAGATION_DAMPING ** hops[id]);
+
+  const describe = (id) => {
+    const key = keys[id];
+    const separator = key.indexOf(':');
+    return { type: key.slice(0, separator), value: key.slice(separator + 1), risk: riskOfId(id), known: known[id] === 1 };
+  };
+
+  return {
+    markKnown(type, value) {
+      const id = nodeId(type, value);
+      if (known[id]) return;
+      known[id] = 1;
+      propagated.delete(id);
+      reach(id, 0);
+    },
+    link(typeA, valueA, typeB, valueB) {
+      const a = nodeId(typeA, valueA);
+      const b = nodeId(typeB, valueB);
+      if (a === b || hasEdge(a, b)) return;
+      addPending(a, b);
+      addPending(b, a);
+      pendingCount++;
+      edgeCount++;
+      if (hops[a] < GRAPH_PROPAGATION_ITERATIONS && hops[a] + 1 < hops[b]) reach(b, hops[a] + 1);
+      else if (hops[b] < GRAPH_PROPAGATION_ITERATIONS && hops[b] + 1 < hops[a]) reach(a, hops[b] + 1);
+      // 追加分が確定済みの辺に比べて増えたら、次のタスクでまとめて圧縮する
+      if (!compactTimer && pendingCount >= Math.max(GRAPH_COMPACT_MIN_PENDING, edgeCount >> 2)) {
+        compactTimer = setTimeout(compact, 0);
+      }
+    },
+    riskOf(type, value) {
+      const id = lookup(type, value);
+      return id === undefined ? null : describe(id);
+    },
+    neighbors(type, value, limit = 50) {
+      const id = lookup(type, value);
+      if (id === undefined) return null;
+      const found = [];
+      forEachNeighbor(id, w => found.push(w));
+      return found.map(describe).sort((a, b) => b.risk - a.risk).slice(0, limit);
+    },
+    // 伝播によって危険度が上がったノード（既知のものは除く）
+    topPropagated(limit = 10) {
+      const top = [];
+      propagated.forEach(v => {
+        if (top.length < limit) top.push(v);
+        else if (hops[v] < hops[top[top.length - 1]]) top[top.length - 1] = v;
+        else return;
+        top.sort((a, b) => hops[a] - hops[b]);
+      });
+      return top.map(describe);
+    },
+    stats() {
+      return { nodes: keys.length, edges: edgeCount };
+    }
+  };
+};
+
+const createSeededGraph = () => {
+  const graph = createCorrelationGraph();
+  SCAM_NUMBERS.forEach(number => graph.markKnown('phone', number));
+  return graph;
+};
+
+// メール1通を、送信元・リンク先・本文中の電話番号と結ぶ
+const linkEmailAnalysis = (graph, message, result) => {
+  const { sender, hosts, dangerousHosts, numbers } = result.related;
+  const mail = messageDigest(message);
+  if (sender) graph.link('mail', mail, 'host', sender);
+  hosts.forEach(host => graph.link('mail', mail, 'host', host));
+  numbers.forEach(number => graph.link('mail', mail, 'phone', number));
+  dangerousHosts.forEach(host => graph.markKnown('host', host));
+};
+
+// ローカルDB（IndexedDB）
+const IDB_NAME = 'scamPrevention';
+const IDB_VERSION = 5;
+const ANALYSES_INDEXES = {
+  time: 'time',
+  riskLevel_time: ['riskLevel', 'time'],
+  riskLevel_prefix_time: ['riskLevel', 'prefix', 'time'],
+  prefix_time: ['prefix', 'time'],
+  host_time: ['host', 'time'],
+  kind_time: ['kind', 'time'],
+  kind_riskLevel_time: ['kind', 'riskLevel', 'time']
+};
+
+const openDatabase = () => new Promise((resolve, reject) => {
+  const request = indexedDB.open(IDB_NAME, IDB_VERSION);
+  request.onupgradeneeded = () => {
+    const db = request.result;
+    if (!db.objectStoreNames.contains('spill')) db.createObjectStore('spill');
+    if (!db.objectStoreNames.contains('learners')) db.createObjectStore('learners', { keyPath: 'id' });
+    const analyses = db.objectStoreNames.contains('analyses')
+      ? request.transaction.objectStore('analyses')
+      : db.createObjectStore('analyses', { keyPath: 'seq', autoIncrement: true });
+    Object.entries(ANALYSES_INDEXES).forEach(([name, keyPath]) => {
+      if (!analyses.indexNames.contains(name)) analyses.createIndex(name, keyPath);
+    });
+    // 版3の索引（番号順にしか並ばず期間で絞れない）は prefix_time に置き換えた
+    if (analyses.indexNames.contains('normalized_time')) analyses.deleteIndex('normalized_time');
+  };
+  request.onsuccess = () => {
+    const db = request.result;
+    // 別のタブが新しい版へ上げるときは接続を閉じて譲る
+    db.onversionchange = () => {
+      db.close();
+      databasePromise = null;
+    };
+    resolve(db);
+  };
+  request.onerror = () => reject(request.error);
+  // 古い版を開いたままのタブがあると更新できない（待ち続けずに失敗させる）
+  request.onblocked = () => reject(new Error('IndexedDB upgrade blocked by another tab'));
+});
+
+let databasePromise = null;
+const getDatabase = () => databasePromise || (databasePromise = openDatabase().catch(error => {
+  databasePromise = null;
+  throw error;
+}));
+
+// 1トランザクションで処理し、完了後に最後のリクエスト結果を返す
+const idbRequest = (storeNames, mode, fn) => getDatabase().then(db => new Promise((resolve, reject) => {
+  const tx = db.transaction(storeNames, mode);
+  const request = fn(tx.objectStore(Array.isArray(storeNames) ? storeNames[0] : storeNames), tx);
+  tx.oncomplete = () => resolve(request ? request.result : undefined);
+  tx.onerror = () => reject(tx.error);
+  tx.onabort = () => reject(tx.error);
+}));
+
+// 分析結果の履歴（追記のみ・まとめて書き込む）
+const ANALYSIS_LOG_FLUSH_MS = 500;
+const ANALYSIS_LOG_BATCH_SIZE = 1000;
+const ANALYSIS_LOG_MAX_PENDING = 10 * ANALYSIS_LOG_BATCH_SIZE;
+const ANALYSIS_INPUT_CHARS = 200;
+const HISTORY_PREFIX_LENGTH = 3;
+const HISTORY_PAGE_SIZE = 200;
+// 索引で絞り切れない条件（1〜2桁の前方一致など）で読み進める行数の上限
+const HISTORY_SCAN_LIMIT = 50000;
+const HISTORY_PERIODS = { day: 24 * 60 * 60 * 1000, week: 7 * 24 * 60 * 60 * 1000, month: 30 * 24 * 60 * 60 * 1000 };
+
+const historyEntry = (kind, input, result, time = Date.now()) => {
+  const normalized = kind === 'phone' ? result.normalized : '';
+  return {
+    time,
+    kind,
+    input: input.slice(0, ANALYSIS_INPUT_CHARS),
+    riskLevel: result.riskLevel,
+    riskScore: result.riskScore,
+    normalized,
+    prefix: normalized.slice(0, HISTORY_PREFIX_LENGTH),
+    host: (result.host || '').toLowerCase()
+  };
+};
+
+const createAnalysisLog = () => {
+  let queue = [];
+  let timer = null;
+
+  const flush = () => {
+    if (timer) clearTimeout(timer);
+    timer = null;
+    if (queue.length === 0) return Promise.resolve();
+    const batch = queue;
+    queue = [];
+    return idbRequest('analyses', 'readwrite', store => {
+      batch.forEach(entry => store.add(entry));
+      return null;
+    }).catch(error => {
+      // 書き込めなかった分は戻して次の書き込みで再試行する（上限を超えたら古いものから捨てる）
+      queue = batch.concat(queue).slice(-ANALYSIS_LOG_MAX_PENDING);
+      throw error;
+    });
+  };
+  const flushInBackground = () => flush().catch(() => {});
+
+  return {
+    record(entry) {
+      queue.push(entry);
+      if (queue.length >= ANALYSIS_LOG_BATCH_SIZE) flushInBackground();
+      else if (!timer) timer = setTimeout(flushInBackground, ANALYSIS_LOG_FLUSH_MS);
+    },
+    flush
+  };
+};
+
+// 条件に合う索引を選び、新しい順に limit 件まで読む
+const planHistoryQuery = ({ riskLevel, numberPrefix, host, kind, since, until }) => {
+  if (riskLevel && numberPrefix.length >= HISTORY_PREFIX_LENGTH) {
+    const prefix = numberPrefix.slice(0, HISTORY_PREFIX_LENGTH);
+    return {
+      index: 'riskLevel_prefix_time',
+      range: IDBKeyRange.bound([riskLevel, prefix, since], [riskLevel, prefix, until]),
+      exact: numberPrefix.length === HISTORY_PREFIX_LENGTH && !host && !kind
+    };
+  }
+  if (host) {
+    return { index: 'host_time', range: IDBKeyRange.bound([host, since], [host, until]), exact: !riskLevel && !numberPrefix && !kind };
+  }
+  if (numberPrefix.length >= HISTORY_PREFIX_LENGTH) {
+    const prefix = numberPrefix.slice(0, HISTORY_PREFIX_LENGTH);
+    return {
+      index: 'prefix_time',
+      range: IDBKeyRange.bound([prefix, since], [prefix, until]),
+      exact: numberPrefix.length === HISTORY_PREFIX_LENGTH && !riskLevel && !kind
+    };
+  }
+  // 短い前方一致は絞り込みが効かないので、期間の索引を新しい順に読んでふるい分ける
+  if (kind && riskLevel) {
+    return {
+      index: 'kind_riskLevel_time',
+      range: IDBKeyRange.bound([kind, riskLevel, since], [kind, riskLevel, until]),
+      exact: !numberPrefix
+    };
+  }
+  if (kind) {
+    return { index: 'kind_time', range: IDBKeyRange.bound([kind, since], [kind, until]), exact: !numberPrefix };
+  }
+  if (riskLevel) {
+    return { index: 'riskLevel_time', range: IDBKeyRange.bound([riskLevel, since], [riskLevel, until]), exact: !numberPrefix };
+  }
+  return { index: 'time', range: IDBKeyRange.bound(since, until), exact: !numberPrefix };
+};
+
+// 読み進めた行数が上限に達したら打ち切り、partial で知らせる
+const queryAnalyses = (filters, limit = HISTORY_PAGE_SIZE, scanLimit = HISTORY_SCAN_LIMIT) => {
+  const query = { riskLevel: '', numberPrefix: '', host: '', kind: '', since: 0, until: Date.now(), ...filters };
+  const plan = planHistoryQuery(query);
+  const matches = (row) => (!query.riskLevel || row.riskLevel === query.riskLevel)
+    && (!query.numberPrefix || row.normalized.startsWith(query.numberPrefix))
+    && (!query.host || row.host === query.host)
+    && (!query.kind || row.kind === query.kind)
+    && row.time >= query.since && row.time <= query.until;
+
+  return getDatabase().then(db => new Promise((resolve, reject) => {
+    const rows = [];
+    let scanned = 0;
+    let partial = false;
+    const tx = db.transaction('analyses', 'readonly');
+    const index = tx.objectStore('analyses').index(plan.index);
+    const countRequest = plan.exact ? index.count(plan.range) : null;
+    const cursorRequest = index.openCursor(plan.range, 'prev');
+    cursorRequest.onsuccess = () => {
+      const cursor = cursorRequest.result;
+      if (!cursor || rows.length >= limit) return;
+      if (scanned >= scanLimit) {
+        partial = true;
+        return;
+      }
+      scanned++;
+      if (matches(cursor.value)) rows.push(cursor.value);
+      cursor.continue();
+    };
+    tx.oncomplete = () => resolve({ rows, total: countRequest ? countRequest.result : null, index: plan.index, partial });
+    tx.onerror = () => reject(tx.error);
+  }));
+};
+
+// セッションごとのメモリ予算（管理画面から変更可能・全タブで共有）
+const SESSION_ID_KEY = 'scamPrevention.sessionId';
+const SESSION_KEY_PREFIX = 'scamPrevention.session.';
+const SESSION_LIMITS_KEY = 'scamPrevention.sessionLimits';
+const SESSION_HEARTBEAT_MS = 10000;
+// 読み込み1チャンク分の行・判定文字列に見込むメモリ
+const SCREENING_READ_BYTES = 4 * 1024 * 1024;
+const SCREENING_PREVIEW_LINES = 20;
+const DEFAULT_SESSION_LIMITS = {
+  budgetBytes: 64 * 1024 * 1024,
+  spillBytes: 1024 * 1024,
+  idleMs: 15 * 60 * 1000
+};
+
+const loadSessionLimits = () => {
+  try {
+    return { ...DEFAULT_SESSION_LIMITS, ...JSON.parse(localStorage.getItem(SESSION_LIMITS_KEY) || '{}') };
+  } catch (e) {
+    return { ...DEFAULT_SESSION_LIMITS };
+  }
+};
+
+const getSessionId = () => {
+  let id = sessionStorage.getItem(SESSION_ID_KEY);
+  if (!id) {
+    id = crypto.randomUUID();
+    sessionStorage.setItem(SESSION_ID_KEY, id);
+  }
+  return id;
+};
+
+const writeSessionEntry = (id, entry) => {
+  try {
+    localStorage.setItem(SESSION_KEY_PREFIX + id, JSON.stringify({ id, ...entry }));
+  } catch (e) {
+    // 書き込めなくても分析処理には影響しない
+  }
+};
+
+const removeSessionEntry = (id) => localStorage.removeItem(SESSION_KEY_PREFIX + id);
+
+const listSessionEntries = () => {
+  const entries = [];
+  for (let i = 0; i < localStorage.length; i++) {
+    const key = localStorage.key(i);
+    if (!key || !key.startsWith(SESSION_KEY_PREFIX)) continue;
+    try {
+      entries.push(JSON.parse(localStorage.getItem(key)));
+    } catch (e) {
+      // 壊れたエントリは無視
+    }
+  }
+  return entries.sort((a, b) => (b.bytes + b.spilledBytes) - (a.bytes + a.spilledBytes));
+};
+
+// 保持データのおおよそのメモリ量（文字列は UTF-16 で2バイト/文字）
+const estimateBytes = (value) => {
+  let total = 0;
+  const stack = [value];
+  while (stack.length > 0) {
+    const item = stack.pop();
+    if (item === null || item === undefined) continue;
+    if (typeof item === 'string') total += item.length * 2;
+    else if (typeof item === 'number') total += 8;
+    else if (typeof item === 'boolean') total += 4;
+    else if (typeof Blob !== 'undefined' && item instanceof Blob) total += item.size;
+    else if (ArrayBuffer.isView(item)) total += item.byteLength;
+    else if (Array.isArray(item)) stack.push(...item);
+    else if (typeof item === 'object') {
+      Object.keys(item).forEach(key => {
+        total += key.length * 2;
+        stack.push(item[key]);
+      });
+    }
+  }
+  return total;
+};
+
+const formatBytes = (bytes) => {
+  if (bytes >= 1024 * 1024) return `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
+  if (bytes >= 1024) return `${(bytes / 1024).toFixed(1)} KB`;
+  return `${bytes} B`;
+};
+
+// 大きな結果セットのディスク退避（キーはセッションIDで区切る）
+const spillKey = (sessionId, name) => `${sessionId}:${name}`;
+const spillPut = (key, value) => idbRequest('spill', 'readwrite', store => store.put(value, key));
+const spillGet = (key) => idbRequest('spill', 'readonly', store => store.get(key));
+const spillDropSession = (sessionId) => idbRequest('spill', 'readwrite', store =>
+  store.delete(IDBKeyRange.bound(`${sessionId}:`, `${sessionId}:\uffff`)));
+
+const ScamPreventionApp = () => {
+  const [activeTab, setActiveTab] = useState('home');
+  const [phoneNumber, setPhoneNumber] = useState('');
+  const [urlInput, setUrlInput] = useState('');
+  const [emailContent, setEmailContent] = useState('');
+  const [analysisResult, setAnalysisResult] = useState(null);
+  const [quizIndex, setQuizIndex] = useState(0);
+  const [quizScore, setQuizScore] = useState(0);
+  const [quizAnswered, setQuizAnswered] = useState(false);
+  const [learnerId, setLearnerId] = useState('guest');
+  const [quizItemId, setQuizItemId] = useState(null);
+  const quizLearner = useRef(null);
+  const [screeningProgress, setScreeningProgress] = useState(null);
+  const [screeningResult, setScreeningResult] = useState(null);
+  const [sessionId] = useState(getSessionId);
+  const [sessionLimits, setSessionLimits] = useState(loadSessionLimits);
+  const [sessionNotice, setSessionNotice] = useState(null);
+  const [adminRefresh, setAdminRefresh] = useState(0);
+  const [corpusProgress, setCorpusProgress] = useState(null);
+  const [historyFilters, setHistoryFilters] = useState({ riskLevel: '', numberPrefix: '', host: '', kind: '', period: 'week' });
+  const [historyResult, setHistoryResult] = useState(null);
+  const [analysisLog] = useState(createAnalysisLog);
+  const [correlationGraph] = useState(createSeededGraph);
+  const [graphQuery, setGraphQuery] = useState('');
+  const [velocityTracker] = useState(() => {
+    const tracker = createVelocityTracker();
+    tracker.load();
+    return tracker;
+  });
+
+  // 未書き込みの履歴はページを離れる前に書き出す
+  useEffect(() => {
+    const flush = () => analysisLog.flush().catch(() => {});
+    window.addEventListener('pagehide', flush);
+    return () => {
+      window.removeEventListener('pagehide', flush);
+      flush();
+    };
+  }, [analysisLog]);
+
+  // 頻度集計のスナップショットを定期的に保存（再起動しても窓の状態を失わない）
+  useEffect(() => {
+    const save = () => velocityTracker.save();
+    const timer = setInterval(save, 30000);
+    window.addEventListener('pagehide', save);
+    return () => {
+      clearInterval(timer);
+      window.removeEventListener('pagehide', save);
+      save();
+    };
+  }, [velocityTracker]);
+
+  // セッションのメモリ使用量（退避済みデータは別計上）
+  const spilledBytes = screeningResult && screeningResult.spilledParts ? screeningResult.bytes : 0;
+  const sessionBytes = estimateBytes({ phoneNumber, urlInput, emailContent, analysisResult, quizIndex, quizScore, quizAnswered })
+    + (screeningResult ? estimateBytes(screeningResult) - spilledBytes : 0);
+  const evictableBytes = emailContent.length * 2
+    + (analysisResult ? estimateBytes(analysisResult) : 0)
+    + (screeningResult ? screeningResult.bytes : 0);
+  const sessionInfo = useRef(null);
+  sessionInfo.current = { bytes: sessionBytes, spilledBytes, evictableBytes, activeTab, screening: screeningProgress !== null };
+  const lastActivity = useRef(Date.now());
+
+  // 予算内に収まるか（置き換える値のサイズは差し引く）
+  const fitsSessionBudget = (addedBytes, replacedBytes = 0) => {
+    if (sessionBytes - replacedBytes + addedBytes <= sessionLimits.budgetBytes) return true;
+    setSessionNotice(`⚠️ セッションのメモリ上限（${formatBytes(sessionLimits.budgetBytes)}）を超えるため読み込めません`);
+    return false;
+  };
+
+  // 使用量の報告・アイドルセッションの解放
+  useEffect(() => {
+    const report = () => {
+      const { bytes, spilledBytes: spilled, activeTab: tab } = sessionInfo.current;
+      writeSessionEntry(sessionId, { bytes, spilledBytes: spilled, activeTab: tab, lastActive: lastActivity.current });
+    };
+    const touch = () => { lastActivity.current = Date.now(); };
+    const checkIdle = () => {
+      // 一括判定の実行中は操作がなくても使用中とみなし、退避中のデータを消さない
+      if (sessionInfo.current.screening) touch();
+      report();
+      if (Date.now() - lastActivity.current > sessionLimits.idleMs && sessionInfo.current.evictableBytes > 0) {
+        setEmailContent('');
+        setAnalysisResult(null);
+        setScreeningResult(null);
+        spillDropSession(sessionId).catch(() => {});
+        setSessionNotice('ℹ️ 一定時間操作がなかったため、保持していたデータを解放しました');
+      }
+    };
+    const leave = () => {
+      removeSessionEntry(sessionId);
+      spillDropSession(sessionId).catch(() => {});
+    };
+    const timer = setInterval(checkIdle, SESSION_HEARTBEAT_MS);
+    ['pointerdown', 'keydown'].forEach(type => window.addEventListener(type, touch));
+    window.addEventListener('pagehide', leave);
+    report();
+    return () => {
+      clearInterval(timer);
+      ['pointerdown', 'keydown'].forEach(type => window.removeEventListener(type, touch));
+      window.removeEventListener('pagehide', leave);
+    };
+  }, [sessionId, sessionLimits.idleMs]);
+
+  // 学習者の進捗を読み込み、最初の問題を選ぶ
+  useEffect(() => {
+    if (activeTab !== 'quiz' || (quizLearner.current && quizLearner.current.learner.id === learnerId)) return;
+    let cancelled = false;
+    loadLearner(learnerId).then(learner => {
+      if (cancelled) return;
+      const heap = buildDueHeap(learner);
+      quizLearner.current = { learner, heap };
+      setQuizItemId(nextQuizItem(learner, heap, getQuizBank()));
+    });
+    return () => { cancelled = true; };
+  }, [activeTab, learnerId]);
+
+  // 相関グラフ上で危険なノードとつながっている場合は注意を促す
+  const applyGraphRisk = (type, value, result) => {
+    if (result.riskLevel === '危険') {
+      correlationGraph.markKnown(type, value);
+      return result;
+    }
+    const node = correlationGraph.riskOf(type, value);
+    if (!node || node.known || node.risk < GRAPH_RISK_THRESHOLD) return result;
+    return {
+      ...result,
+      riskLevel: result.riskLevel === '安全' ? '注意' : result.riskLevel,
+      riskScore: Math.max(result.riskScore, Math.round(node.risk * 100)),
+      warnings: [...result.warnings, `🔗 危険な${GRAPH_NODE_LABELS[type]}と同じメールに含まれていたことがあります`]
+    };
   };
 
   // URL分析
   const analyzeUrl = (url) => {
     let riskLevel = '安全';
     let riskScore = 10;
+    let host = '';
     const warnings = [];
     const details = [];
 
     try {
       const urlObj = new URL(url);
+      host = urlObj.hostname;
       details.push(`ドメイン: ${urlObj.hostname}`);
       details.push(`プロトコル: ${urlObj.protocol}`);
 
@@ -134,21 +1833,40 @@ const ScamPreventionApp = () => {
         warnings.push('ℹ️ 短縮URLです。実際のリンク先を確認してください');
       }
 
+      // 出現頻度チェック（分析したメール内での急増）
+      const hostCount = velocityTracker.hostSignal(urlObj.hostname);
+      if (hostCount >= VELOCITY_THRESHOLDS.host) {
+        warnings.push(`⚠️ 直近${VELOCITY_WINDOW_MS / 60000}分間に約${hostCount}通のメールで使われたドメインです`);
+        if (riskLevel === '安全') riskLevel = '注意';
+        riskScore = Math.max(riskScore, 70);
+      }
+
     } catch (e) {
       warnings.push('❌ 無効なURL形式です');
       riskLevel = 'エラー';
       riskScore = 0;
     }
 
-    return { url, riskLevel, riskScore, warnings, details };
+    return { url, host, riskLevel, riskScore, warnings, details };
   };
 
   // メール分析
-  const analyzeEmail = (content) => {
+  const analyzeEmail = (message) => {
     let riskLevel = '安全';
     let riskScore = 10;
     const warnings = [];
     const details = [];
+    const { headers, body } = parseEmailMessage(message);
+    // HTMLメールは表示されるテキストとリンクだけを分析対象にする
+    const html = HTML_HINT.test(body) ? extractHtmlContent(body) : null;
+    const content = html ? html.text : body;
+    let host = headers && headers.from ? headers.from.domain : '';
+    const related = {
+      sender: host,
+      hosts: [],
+      dangerousHosts: [],
+      numbers: extractPhoneNumbers(content)
+    };
 
     // 疑わしいキーワード
     const suspiciousKeywords = ['verify account', 'urgent action', 'suspended', 'アカウント確認', '緊急', '本人確認', 'パスワード更新'];
@@ -160,20 +1878,66 @@ const ScamPreventionApp = () => {
       riskScore = 50;
     }
 
-    // URL検出
-    const urlMatches = content.match(/https?:\/\/[^\s<>"]+/g);
-    if (urlMatches && urlMatches.length > 0) {
+    // URL検出（HTMLメールはリンク先を優先）
+    const hrefs = html ? html.anchors.map(a => a.href).filter(href => /^https?:\/\//i.test(href)) : [];
+    const urlMatches = [...new Set([...hrefs, ...(content.match(/https?:\/\/[^\s<>"]+/g) || [])])];
+    if (urlMatches.length > 0) {
       details.push(`検出されたURL数: ${urlMatches.length}`);
+      // 同じメール内の重複は1回として数える
+      const hosts = new Set();
+      urlMatches.forEach(url => {
+        try {
+          hosts.add(new URL(url).hostname);
+        } catch (e) {
+          // 無効なURLは集計しない
+        }
+      });
+      if (!host && hosts.size > 0) host = hosts.values().next().value;
+      related.hosts = [...hosts];
+      velocityTracker.recordMessageHosts(messageDigest(message), [...hosts]);
+      hosts.forEach(linkedHost => {
+        if (velocityTracker.hostSignal(linkedHost) >= VELOCITY_THRESHOLDS.host) {
+          warnings.push(`⚠️ 多数のメールで急増しているドメインです: ${linkedHost}`);
+          if (riskLevel === '安全') riskLevel = '注意';
+          riskScore = Math.max(riskScore, 70);
+        }
+      });
       urlMatches.slice(0, 2).forEach(url => {
         const urlAnalysis = analyzeUrl(url);
         if (urlAnalysis.riskLevel === '危険') {
           riskLevel = '危険';
           riskScore = 90;
           warnings.push('🚨 危険なURLが含まれています');
+          related.dangerousHosts.push(urlAnalysis.host);
         }
       });
     }
 
+    // リンクの表示と実際のリンク先の食い違い
+    if (html) {
+      findLinkMismatches(html.anchors).slice(0, 3).forEach(({ shown, target, hidden }) => {
+        related.dangerousHosts.push(target);
+        warnings.push(shown === null
+          ? `🚨 非表示のリンクが、表示されているリンクとは別のサイト（${target}）を指しています`
+          : `🚨 リンクの表示（${shown}）と実際のリンク先（${target}）が異なります${hidden ? '（非表示のリンク）' : ''}`);
+        riskLevel = '危険';
+        riskScore = Math.max(riskScore, 90);
+      });
+      details.push(`HTMLメール: リンク ${html.anchors.length}件`);
+      if (html.hiddenChars > 0) details.push(`非表示のテキスト・スクリプト: ${html.hiddenChars}文字`);
+      if (html.truncated) details.push('本文が大きいため先頭部分のみ分析しました');
+    }
+
+    // ヘッダー（送信元・認証結果・中継経路）
+    if (headers) {
+      const headerAnalysis = analyzeEmailHeaders(headers);
+      warnings.push(...headerAnalysis.warnings);
+      details.push(...headerAnalysis.details);
+      if (headerAnalysis.riskScore >= 80) riskLevel = '危険';
+      else if (headerAnalysis.riskScore >= 50 && riskLevel === '安全') riskLevel = '注意';
+      riskScore = Math.max(riskScore, headerAnalysis.riskScore);
+    }
+
     // 緊急性を煽る表現
     const urgentWords = ['今すぐ', '直ちに', '24時間以内', 'immediately', 'urgent'];
     if (urgentWords.some(w => content.toLowerCase().includes(w.toLowerCase()))) {
@@ -181,7 +1945,7 @@ const ScamPreventionApp = () => {
       riskScore = Math.min(riskScore + 20, 100);
     }
 
-    return { riskLevel, riskScore, warnings, details };
+    return { host, related, riskLevel, riskScore, warnings, details };
   };
 
   // リスクカラー
@@ -270,7 +2034,10 @@ const ScamPreventionApp = () => {
   const PhoneTab = () => {
     const handleCheck = () => {
       if (phoneNumber) {
-        setAnalysisResult(analyzePhoneNumber(phoneNumber));
+        const analysis = analyzePhoneNumber(phoneNumber, velocityTracker);
+        const result = applyGraphRisk('phone', analysis.normalized, analysis);
+        analysisLog.record(historyEntry('phone', phoneNumber, result));
+        setAnalysisResult(result);
       }
     };
 
@@ -355,7 +2122,10 @@ const ScamPreventionApp = () => {
   const UrlTab = () => {
     const handleCheck = () => {
       if (urlInput) {
-        setAnalysisResult(analyzeUrl(urlInput));
+        const analysis = analyzeUrl(urlInput);
+        const result = analysis.host ? applyGraphRisk('host', analysis.host, analysis) : analysis;
+        analysisLog.record(historyEntry('url', urlInput, result));
+        setAnalysisResult(result);
       }
     };
 
@@ -431,7 +2201,10 @@ const ScamPreventionApp = () => {
   const EmailTab = () => {
     const handleCheck = () => {
       if (emailContent) {
-        setAnalysisResult(analyzeEmail(emailContent));
+        const result = analyzeEmail(emailContent);
+        linkEmailAnalysis(correlationGraph, emailContent, result);
+        analysisLog.record(historyEntry('email', emailContent, result));
+        setAnalysisResult(result);
       }
     };
 
@@ -443,10 +2216,13 @@ const ScamPreventionApp = () => {
         </div>
 
         <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
-          <label className="block font-semibold mb-2">メール本文を入力</label>
+          <label className="block font-semibold mb-2">メール本文を入力（ヘッダー付きの原文も可）</label>
           <textarea
             value={emailContent}
-            onChange={(e) => setEmailContent(e.target.value)}
+            onChange={(e) => {
+              const value = e.target.value;
+              if (fitsSessionBudget(value.length * 2, emailContent.length * 2)) setEmailContent(value);
+            }}
             placeholder="メールの内容を貼り付けてください"
             className="w-full p-3 border-2 border-gray-300 rounded-lg mb-4 h-40"
           />
@@ -504,19 +2280,24 @@ const ScamPreventionApp = () => {
 
   // クイズタブ
   const QuizTab = () => {
-    const currentQuiz = quizSamples[quizIndex];
+    const bank = getQuizBank();
+    const loaded = quizLearner.current && quizLearner.current.learner.id === learnerId;
+    const currentQuiz = loaded && quizItemId !== null ? bank.get(quizItemId) : null;
 
     const handleAnswer = (answer) => {
       const correct = answer === currentQuiz.isPhishing;
+      const { learner, heap } = quizLearner.current;
+      recordQuizAnswer(learner, heap, quizItemId, correct);
+      saveLearner(learner).catch(() => {});
       if (correct) setQuizScore(quizScore + 1);
       setQuizAnswered(true);
     };
 
     const nextQuiz = () => {
-      if (quizIndex < quizSamples.length - 1) {
-        setQuizIndex(quizIndex + 1);
-        setQuizAnswered(false);
-      }
+      const { learner, heap } = quizLearner.current;
+      setQuizIndex(quizIndex + 1);
+      setQuizAnswered(false);
+      setQuizItemId(nextQuizItem(learner, heap, bank));
     };
 
     const resetQuiz = () => {
@@ -525,6 +2306,15 @@ const ScamPreventionApp = () => {
       setQuizAnswered(false);
     };
 
+    const switchLearner = (e) => {
+      e.preventDefault();
+      const id = new FormData(e.target).get('learnerId').trim();
+      if (!id || id === learnerId) return;
+      resetQuiz();
+      setQuizItemId(null);
+      setLearnerId(id);
+    };
+
     return (
       <div className="space-y-6">
         <div className="flex items-center gap-3 mb-4">
@@ -532,13 +2322,39 @@ const ScamPreventionApp = () => {
           <h2 className="text-2xl font-bold">フィッシング詐欺クイズ</h2>
         </div>
 
+        <form onSubmit={switchLearner} className="flex gap-2">
+          <input
+            name="learnerId"
+            type="text"
+            defaultValue={learnerId}
+            placeholder="学習者ID"
+            className="flex-1 p-3 border-2 border-gray-300 rounded-lg"
+          />
+          <button type="submit" className="px-6 bg-orange-600 hover:bg-orange-700 text-white font-bold rounded-lg">
+            切り替え
+          </button>
+        </form>
+
         <div className="bg-blue-50 p-4 rounded-lg">
-          <p className="font-semibold">スコア: {quizScore} / {quizSamples.length}</p>
-          <p className="text-sm text-gray-600">問題 {quizIndex + 1} / {quizSamples.length}</p>
+          <p className="font-semibold">スコア: {quizScore} / {QUIZ_ROUND_SIZE}</p>
+          <p className="text-sm text-gray-600">問題 {Math.min(quizIndex + 1, QUIZ_ROUND_SIZE)} / {QUIZ_ROUND_SIZE}</p>
+          {loaded && (
+            <p className="text-sm text-gray-600">
+              レベル: {QUIZ_DIFFICULTY_LABELS[quizLearner.current.learner.level]} ・
+              学習済み: {Object.keys(quizLearner.current.learner.cards).length} / {bank.size} 問
+            </p>
+          )}
         </div>
 
-        {quizIndex < quizSamples.length ? (
+        {!currentQuiz ? (
+          <div className="bg-white p-6 rounded-lg border-2 border-gray-200 text-center text-gray-600">
+            問題を読み込んでいます…
+          </div>
+        ) : quizIndex < QUIZ_ROUND_SIZE ? (
           <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
+            <p className="text-xs text-gray-500 mb-2">
+              {QUIZ_CATEGORY_LABELS[currentQuiz.category]} ・ {QUIZ_DIFFICULTY_LABELS[currentQuiz.difficulty]}
+            </p>
             <h3 className="font-bold text-lg mb-3">✉️ 件名: {currentQuiz.subject}</h3>
             <div className="bg-gray-50 p-4 rounded-lg mb-4 whitespace-pre-wrap font-mono text-sm">
               {currentQuiz.content}
@@ -577,12 +2393,12 @@ const ScamPreventionApp = () => {
         ) : (
           <div className="bg-white p-8 rounded-lg border-2 border-gray-200 text-center">
             <h3 className="text-2xl font-bold mb-4">🎉 クイズ終了！</h3>
-            <p className="text-xl mb-6">あなたのスコア: {quizScore} / {quizSamples.length}</p>
+            <p className="text-xl mb-6">あなたのスコア: {quizScore} / {QUIZ_ROUND_SIZE}</p>
             <div className="mb-6">
               <div className="w-full bg-gray-200 rounded-full h-4">
                 <div 
                   className="bg-blue-600 h-4 rounded-full transition-all"
-                  style={{ width: `${(quizScore / quizSamples.length) * 100}%` }}
+                  style={{ width: `${(quizScore / QUIZ_ROUND_SIZE) * 100}%` }}
                 />
               </div>
             </div>
@@ -598,6 +2414,410 @@ const ScamPreventionApp = () => {
     );
   };
 
+  // 着信スクリーニングタブ
+  const ScreeningTab = () => {
+    const handleFile = async (e) => {
+      const file = e.target.files && e.target.files[0];
+      if (!file) return;
+      // 読み込み中に保持するのは、読み込み1回分と退避前の判定結果だけ
+      const previousBytes = screeningResult ? estimateBytes(screeningResult) - spilledBytes : 0;
+      if (!fitsSessionBudget(SCREENING_READ_BYTES + sessionLimits.spillBytes * 2, previousBytes)) return;
+      setScreeningResult(null);
+      await spillDropSession(sessionId).catch(() => {});
+
+      const histogram = createLatencyHistogram();
+      const preview = [];
+      let parts = [];
+      let pendingChars = 0;
+      let spilledParts = 0;
+      let bytes = 0;
+      let totalMs = 0;
+      let readBytes = 0;
+      const spillParts = async () => {
+        await spillPut(spillKey(sessionId, `screening:${spilledParts}`), new Blob(parts, { type: 'text/tab-separated-values' }));
+        spilledParts++;
+        parts = [];
+        pendingChars = 0;
+      };
+
+      setScreeningProgress({ done: 0, percent: 0 });
+      try {
+        for await (const callerIds of readLineChunks(file, read => { readBytes = read; })) {
+          const { verdicts, stats } = await screenCallerIds(callerIds, { tracker: velocityTracker, log: analysisLog, histogram });
+          const text = verdicts.join('\n') + '\n';
+          if (preview.length < SCREENING_PREVIEW_LINES) preview.push(...verdicts.slice(0, SCREENING_PREVIEW_LINES - preview.length));
+          parts.push(text);
+          pendingChars += text.length;
+          bytes += text.length * 2;
+          totalMs += stats.totalMs;
+          // 判定結果は退避しきい値を超えるたびにディスクへ書き出す
+          if (pendingChars * 2 > sessionLimits.spillBytes) await spillParts();
+          setScreeningProgress({ done: histogram.count, percent: Math.round((readBytes / Math.max(file.size, 1)) * 100) });
+        }
+
+        const result = {
+          fileName: file.name,
+          bytes,
+          preview,
+          stats: {
+            count: histogram.count,
+            totalMs,
+            p50: histogram.percentile(0.5),
+            p99: histogram.percentile(0.99),
+            p999: histogram.percentile(0.999)
+          }
+        };
+        if (spilledParts > 0) {
+          if (parts.length > 0) await spillParts();
+          result.spilledParts = spilledParts;
+        } else {
+          result.blob = new Blob(parts, { type: 'text/tab-separated-values' });
+        }
+        setScreeningResult(result);
+      } catch (error) {
+        // 退避先に書けないときは途中で打ち切り、進捗表示を残さない
+        setSessionNotice(`⚠️ 一括判定を完了できませんでした（${error.message}）`);
+      } finally {
+        setScreeningProgress(null);
+      }
+    };
+
+    const handleDownload = async () => {
+      let blob = screeningResult.blob;
+      if (!blob) {
+        const parts = [];
+        for (let i = 0; i < screeningResult.spilledParts; i++) parts.push(await spillGet(spillKey(sessionId, `screening:${i}`)).catch(() => null));
+        if (parts.some(part => !part)) {
+          setSessionNotice('⚠️ 退避した判定結果が見つかりません。ファイルをもう一度読み込んでください');
+          return;
+        }
+        blob = new Blob(parts, { type: 'text/tab-separated-values' });
+      }
+      const url = URL.createObjectURL(blob);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = 'verdicts.tsv';
+      link.click();
+      setTimeout(() => URL.revokeObjectURL(url), 0);
+    };
+
+    return (
+      <div className="space-y-6">
+        <div className="flex items-center gap-3 mb-4">
+          <Activity className="w-8 h-8 text-red-600" />
+          <h2 className="text-2xl font-bold">着信スクリーニング</h2>
+        </div>
+
+        <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
+          <label className="block font-semibold mb-2">発信者番号ファイル（1行に1番号）</label>
+          <input
+            type="file"
+            accept=".txt,.log,.csv"
+            onChange={handleFile}
+            className="w-full p-3 border-2 border-gray-300 rounded-lg mb-2"
+          />
+          <p className="text-sm text-gray-600">PBXの代わりにファイルから着信を読み込み、判定結果をTSVで書き出します。</p>
+        </div>
+
+        {screeningProgress && (
+          <div className="bg-blue-50 p-4 rounded-lg">
+            <p className="font-semibold">処理中: {screeningProgress.done}件（{screeningProgress.percent}%）</p>
+          </div>
+        )}
+
+        {screeningResult && (
+          <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
+            <h3 className="font-bold text-lg mb-3">📊 {screeningResult.fileName}</h3>
+            <div className="grid grid-cols-2 md:grid-cols-4 gap-2 mb-4 text-sm">
+              <p><strong>件数:</strong> {screeningResult.stats.count}</p>
+              <p><strong>p50:</strong> {screeningResult.stats.p50.toFixed(3)} ms</p>
+              <p><strong>p99:</strong> {screeningResult.stats.p99.toFixed(3)} ms</p>
+              <p><strong>p999:</strong> {screeningResult.stats.p999.toFixed(3)} ms</p>
+            </div>
+            <p className="text-sm mb-4">合計処理時間: {screeningResult.stats.totalMs.toFixed(1)} ms</p>
+            <div className="bg-gray-50 p-4 rounded-lg mb-4 whitespace-pre-wrap font-mono text-sm">
+              {screeningResult.preview.join('\n')}
+            </div>
+            <button
+              onClick={handleDownload}
+              className="w-full bg-red-600 hover:bg-red-700 text-white font-bold py-3 rounded-lg"
+            >
+              判定結果をダウンロード{screeningResult.spilledParts ? '（ディスク退避済み）' : ''}
+            </button>
+          </div>
+        )}
+      </div>
+    );
+  };
+
+  // 履歴タブ
+  const HistoryTab = () => {
+    const handleSearch = async (e) => {
+      e.preventDefault();
+      const form = new FormData(e.target);
+      const filters = {
+        riskLevel: form.get('riskLevel'),
+        numberPrefix: normalizePhoneNumber(form.get('numberPrefix').trim()),
+        host: form.get('host').trim().toLowerCase(),
+        kind: form.get('kind'),
+        period: form.get('period')
+      };
+      setHistoryFilters(filters);
+      try {
+        await analysisLog.flush();
+        const startedAt = performance.now();
+        const now = Date.now();
+        const { rows, total, partial } = await queryAnalyses({
+          ...filters,
+          since: HISTORY_PERIODS[filters.period] ? now - HISTORY_PERIODS[filters.period] : 0,
+          until: now
+        });
+        setHistoryResult({ rows, total, partial, elapsedMs: performance.now() - startedAt });
+      } catch (error) {
+        setSessionNotice(`⚠️ 履歴を検索できませんでした（${error.message}）`);
+      }
+    };
+
+    return (
+      <div className="space-y-6">
+        <div className="flex items-center gap-3 mb-4">
+          <Clock className="w-8 h-8 text-teal-600" />
+          <h2 className="text-2xl font-bold">分析履歴</h2>
+        </div>
+
+        <form onSubmit={handleSearch} className="bg-white p-6 rounded-lg border-2 border-gray-200">
+          <div className="grid grid-cols-2 md:grid-cols-5 gap-4 mb-4 text-sm">
+            <label className="block">
+              <span className="font-semibold">リスク判定</span>
+              <select name="riskLevel" defaultValue={historyFilters.riskLevel} className="w-full p-2 border-2 border-gray-300 rounded-lg">
+                <option value="">すべて</option>
+                {['危険', '注意', '緊急', '安全', 'エラー'].map(level => <option key={level} value={level}>{level}</option>)}
+              </select>
+            </label>
+            <label className="block">
+              <span className="font-semibold">種別</span>
+              <select name="kind" defaultValue={historyFilters.kind} className="w-full p-2 border-2 border-gray-300 rounded-lg">
+                <option value="">すべて</option>
+                <option value="phone">電話</option>
+                <option value="url">URL</option>
+                <option value="email">メール</option>
+              </select>
+            </label>
+            <label className="block">
+              <span className="font-semibold">番号の先頭</span>
+              <input name="numberPrefix" type="text" defaultValue={historyFilters.numberPrefix} placeholder="例: 050" className="w-full p-2 border-2 border-gray-300 rounded-lg" />
+            </label>
+            <label className="block">
+              <span className="font-semibold">ドメイン</span>
+              <input name="host" type="text" defaultValue={historyFilters.host} placeholder="例: example.com" className="w-full p-2 border-2 border-gray-300 rounded-lg" />
+            </label>
+            <label className="block">
+              <span className="font-semibold">期間</span>
+              <select name="period" defaultValue={historyFilters.period} className="w-full p-2 border-2 border-gray-300 rounded-lg">
+                <option value="day">今日</option>
+                <option value="week">今週</option>
+                <option value="month">今月</option>
+                <option value="all">すべて</option>
+              </select>
+            </label>
+          </div>
+          <button
+            type="submit"
+            className="w-full bg-teal-600 hover:bg-teal-700 text-white font-bold py-3 rounded-lg flex items-center justify-center gap-2"
+          >
+            <Search className="w-5 h-5" />
+            検索
+          </button>
+        </form>
+
+        {historyResult && (
+          <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
+            <p className="text-sm text-gray-600 mb-3">
+              {historyResult.total !== null ? `${historyResult.total}件中 ` : ''}
+              {historyResult.rows.length}件を表示（{historyResult.elapsedMs.toFixed(1)} ms）
+              {historyResult.partial && `・新しい順に${HISTORY_SCAN_LIMIT}件まで調べた時点の結果です`}
+            </p>
+            <div className="space-y-2 text-sm">
+              {historyResult.rows.map(row => (
+                <div key={row.seq} className={`p-3 rounded border-l-4 ${getRiskColor(row.riskLevel)}`}>
+                  <p className="font-mono truncate">{row.input}</p>
+                  <p className="text-xs">
+                    {new Date(row.time).toLocaleString('ja-JP')} ・ {row.kind} ・ {row.riskLevel}（{row.riskScore}）
+                    {row.host && ` ・ ${row.host}`}
+                  </p>
+                </div>
+              ))}
+            </div>
+          </div>
+        )}
+      </div>
+    );
+  };
+
+  // 管理タブ（セッションごとの使用量）
+  const AdminTab = () => {
+    const now = Date.now();
+    const sessions = listSessionEntries();
+    const isStale = (entry) => now - entry.lastActive > sessionLimits.idleMs * 2;
+
+    const handleLimits = (e) => {
+      e.preventDefault();
+      const form = new FormData(e.target);
+      const limits = {
+        budgetBytes: Number(form.get('budgetMb')) * 1024 * 1024,
+        spillBytes: Number(form.get('spillMb')) * 1024 * 1024,
+        idleMs: Number(form.get('idleMinutes')) * 60 * 1000
+      };
+      if (Object.values(limits).some(v => !(v > 0))) return;
+      localStorage.setItem(SESSION_LIMITS_KEY, JSON.stringify(limits));
+      setSessionLimits(limits);
+    };
+
+    const handleCorpus = async (e) => {
+      e.preventDefault();
+      const form = new FormData(e.target);
+      const options = {
+        seed: Number(form.get('seed')),
+        count: Number(form.get('count')),
+        phishingRatio: Number(form.get('phishingPercent')) / 100,
+        obfuscation: Number(form.get('obfuscation')),
+        duplicateRate: Number(form.get('duplicatePercent')) / 100
+      };
+      const fileName = `corpus-${options.seed}-${options.count}.jsonl.gz`;
+      const onProgress = (written) => setCorpusProgress({ written, total: options.count });
+
+      try {
+        // 保存先を選べるブラウザではディスクへ直接書き出す
+        if (window.showSaveFilePicker) {
+          const handle = await window.showSaveFilePicker({ suggestedName: fileName });
+          await writeCorpusJsonl(generateCorpus(options), await handle.createWritable(), { onProgress });
+        } else {
+          const { readable, writable } = new TransformStream();
+          const blobPromise = new Response(readable).blob();
+          await writeCorpusJsonl(generateCorpus(options), writable, { onProgress });
+          const url = URL.createObjectURL(await blobPromise);
+          const link = document.createElement('a');
+          link.href = url;
+          link.download = fileName;
+          link.click();
+          setTimeout(() => URL.revokeObjectURL(url), 0);
+        }
+      } catch (error) {
+        // 保存ダイアログのキャンセルはエラー扱いしない
+        if (error.name !== 'AbortError') setSessionNotice(`⚠️ コーパスを書き出せませんでした（${error.message}）`);
+      } finally {
+        setCorpusProgress(null);
+      }
+    };
+
+    const purgeStale = async () => {
+      const stale = sessions.filter(entry => entry.id !== sessionId && isStale(entry));
+      await Promise.all(stale.map(entry => spillDropSession(entry.id).catch(() => {})));
+      stale.forEach(entry => removeSessionEntry(entry.id));
+      setAdminRefresh(adminRefresh + 1);
+    };
+
+    return (
+      <div className="space-y-6">
+        <div className="flex items-center gap-3 mb-4">
+          <Server className="w-8 h-8 text-gray-600" />
+          <h2 className="text-2xl font-bold">セッション管理</h2>
+        </div>
+
+        <form onSubmit={handleLimits} className="bg-white p-6 rounded-lg border-2 border-gray-200">
+          <h3 className="font-bold text-lg mb-3">⚙️ メモリ予算</h3>
+          <div className="grid grid-cols-1 md:grid-cols-3 gap-4 mb-4 text-sm">
+            <label className="block">
+              <span className="font-semibold">上限（MB）</span>
+              <input name="budgetMb" type="number" min="1" defaultValue={sessionLimits.budgetBytes / (1024 * 1024)} className="w-full p-2 border-2 border-gray-300 rounded-lg" />
+            </label>
+            <label className="block">
+              <span className="font-semibold">ディスク退避（MB超）</span>
+              <input name="spillMb" type="number" min="0.1" step="0.1" defaultValue={sessionLimits.spillBytes / (1024 * 1024)} className="w-full p-2 border-2 border-gray-300 rounded-lg" />
+            </label>
+            <label className="block">
+              <span className="font-semibold">アイドル解放（分）</span>
+              <input name="idleMinutes" type="number" min="1" defaultValue={sessionLimits.idleMs / 60000} className="w-full p-2 border-2 border-gray-300 rounded-lg" />
+            </label>
+          </div>
+          <button type="submit" className="w-full bg-gray-700 hover:bg-gray-800 text-white font-bold py-3 rounded-lg">
+            保存
+          </button>
+        </form>
+
+        <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
+          <div className="flex items-center justify-between mb-3">
+            <h3 className="font-bold text-lg">📊 セッション一覧（{sessions.length}件）</h3>
+            <div className="flex gap-2">
+              <button onClick={() => setAdminRefresh(adminRefresh + 1)} className="px-3 py-1 bg-gray-100 hover:bg-gray-200 rounded text-sm">更新</button>
+              <button onClick={purgeStale} className="px-3 py-1 bg-red-100 hover:bg-red-200 rounded text-sm">期限切れを削除</button>
+            </div>
+          </div>
+          <div className="space-y-2 text-sm">
+            {sessions.map(entry => (
+              <div
+                key={entry.id}
+                className={`p-3 rounded border-l-4 ${entry.bytes > sessionLimits.budgetBytes ? 'bg-red-50 border-red-500' : 'bg-gray-50 border-gray-300'}`}
+              >
+                <p className="font-mono">
+                  {entry.id.slice(0, 8)}
+                  {entry.id === sessionId && ' （このセッション）'}
+                  {isStale(entry) && ' （期限切れ）'}
+                </p>
+                <p>
+                  メモリ: {formatBytes(entry.bytes)} / 退避: {formatBytes(entry.spilledBytes)} / タブ: {entry.activeTab} /
+                  最終操作: {Math.round((now - entry.lastActive) / 1000)}秒前
+                </p>
+              </div>
+            ))}
+          </div>
+        </div>
+
+        <form onSubmit={handleCorpus} className="bg-white p-6 rounded-lg border-2 border-gray-200">
+          <h3 className="font-bold text-lg mb-3">🧪 負荷テスト用コーパス生成</h3>
+          <div className="grid grid-cols-2 md:grid-cols-5 gap-4 mb-4 text-sm">
+            <label className="block">
+              <span className="font-semibold">シード</span>
+              <input name="seed" type="number" defaultValue="1" className="w-full p-2 border-2 border-gray-300 rounded-lg" />
+            </label>
+            <label className="block">
+              <span className="font-semibold">件数</span>
+              <input name="count" type="number" min="1" defaultValue={window.showSaveFilePicker ? CORPUS_DEFAULT_COUNT : CORPUS_BUFFERED_COUNT} className="w-full p-2 border-2 border-gray-300 rounded-lg" />
+            </label>
+            <label className="block">
+              <span className="font-semibold">詐欺の割合（%）</span>
+              <input name="phishingPercent" type="number" min="0" max="100" defaultValue="30" className="w-full p-2 border-2 border-gray-300 rounded-lg" />
+            </label>
+            <label className="block">
+              <span className="font-semibold">難読化</span>
+              <select name="obfuscation" defaultValue="0" className="w-full p-2 border-2 border-gray-300 rounded-lg">
+                <option value="0">なし</option>
+                <option value="1">弱</option>
+                <option value="2">強</option>
+              </select>
+            </label>
+            <label className="block">
+              <span className="font-semibold">キャンペーン重複（%）</span>
+              <input name="duplicatePercent" type="number" min="0" max="100" defaultValue="10" className="w-full p-2 border-2 border-gray-300 rounded-lg" />
+            </label>
+          </div>
+          {!window.showSaveFilePicker && (
+            <p className="text-sm text-gray-600 mb-3">
+              このブラウザでは保存先を選べないため、書き出し結果を一度メモリに保持してからダウンロードします。大きな件数ではメモリが不足することがあります。
+            </p>
+          )}
+          {corpusProgress ? (
+            <p className="font-semibold">生成中: {corpusProgress.written} / {corpusProgress.total}</p>
+          ) : (
+            <button type="submit" className="w-full bg-gray-700 hover:bg-gray-800 text-white font-bold py-3 rounded-lg">
+              JSONL（gzip）を書き出す
+            </button>
+          )}
+        </form>
+      </div>
+    );
+  };
+
   // ガイドタブ
   const GuideTab = () => (
     <div className="space-y-6">
@@ -685,85 +2905,152 @@ const ScamPreventionApp = () => {
   );
 
   // データベースタブ
-  const DatabaseTab = () => (
-    <div className="space-y-6">
-      <div className="flex items-center gap-3 mb-4">
-        <Database className="w-8 h-8 text-indigo-600" />
-        <h2 className="text-2xl font-bold">脅威データベース</h2>
-      </div>
+  const DatabaseTab = () => {
+    const graphStats = correlationGraph.stats();
+    const propagated = correlationGraph.topPropagated();
+    const queryType = /[a-z]/i.test(graphQuery) ? 'host' : 'phone';
+    const graphNeighbors = graphQuery ? correlationGraph.neighbors(queryType, graphQuery) : null;
+
+    const handleGraphSearch = (e) => {
+      e.preventDefault();
+      setGraphQuery(new FormData(e.target).get('graphQuery').trim());
+    };
 
-      <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
-        <h3 className="font-bold text-lg mb-4 flex items-center gap-2">
-          <XCircle className="w-5 h-5 text-red-600" />
-          既知の詐欺電話番号
-        </h3>
-        <div className="space-y-2">
-          {['03-1234-5678', '0120-999-999', '050-1111-2222', '090-1234-5678'].map((num, i) => (
-            <div key={i} className="bg-red-50 p-3 rounded border-l-4 border-red-500">
-              <code className="font-mono">{num}</code>
-            </div>
-          ))}
+    return (
+      <div className="space-y-6">
+        <div className="flex items-center gap-3 mb-4">
+          <Database className="w-8 h-8 text-indigo-600" />
+          <h2 className="text-2xl font-bold">脅威データベース</h2>
         </div>
-      </div>
 
-      <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
-        <h3 className="font-bold text-lg mb-4 flex items-center gap-2">
-          <AlertTriangle className="w-5 h-5 text-yellow-600" />
-          疑わしいプレフィックス
-        </h3>
-        <div className="grid grid-cols-2 gap-2">
-          {['050', '070', '+675', '+234', '+1-876'].map((prefix, i) => (
-            <div key={i} className="bg-yellow-50 p-3 rounded border border-yellow-300 text-center">
-              <code className="font-mono font-bold">{prefix}</code>
-            </div>
-          ))}
+        <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
+          <h3 className="font-bold text-lg mb-4 flex items-center gap-2">
+            <XCircle className="w-5 h-5 text-red-600" />
+            既知の詐欺電話番号
+          </h3>
+          <div className="space-y-2">
+            {['03-1234-5678', '0120-999-999', '050-1111-2222', '090-1234-5678'].map((num, i) => (
+              <div key={i} className="bg-red-50 p-3 rounded border-l-4 border-red-500">
+                <code className="font-mono">{num}</code>
+              </div>
+            ))}
+          </div>
         </div>
-      </div>
 
-      <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
-        <h3 className="font-bold text-lg mb-4 flex items-center gap-2">
-          <Globe className="w-5 h-5 text-orange-600" />
-          危険なドメインパターン
-        </h3>
-        <div className="space-y-2 text-sm">
-          <div className="bg-orange-50 p-3 rounded border-l-4 border-orange-500">
-            <p className="font-mono">*-login.com</p>
-            <p className="text-xs text-gray-600 mt-1">例: paypal-secure-login.com</p>
+        <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
+          <h3 className="font-bold text-lg mb-4 flex items-center gap-2">
+            <AlertTriangle className="w-5 h-5 text-yellow-600" />
+            疑わしいプレフィックス
+          </h3>
+          <div className="grid grid-cols-2 gap-2">
+            {['050', '070', '+675', '+234', '+1-876'].map((prefix, i) => (
+              <div key={i} className="bg-yellow-50 p-3 rounded border border-yellow-300 text-center">
+                <code className="font-mono font-bold">{prefix}</code>
+              </div>
+            ))}
           </div>
-          <div className="bg-orange-50 p-3 rounded border-l-4 border-orange-500">
-            <p className="font-mono">*-verify.net</p>
-            <p className="text-xs text-gray-600 mt-1">例: amazon-verify.net</p>
+        </div>
+
+        <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
+          <h3 className="font-bold text-lg mb-4 flex items-center gap-2">
+            <Globe className="w-5 h-5 text-orange-600" />
+            危険なドメインパターン
+          </h3>
+          <div className="space-y-2 text-sm">
+            <div className="bg-orange-50 p-3 rounded border-l-4 border-orange-500">
+              <p className="font-mono">*-login.com</p>
+              <p className="text-xs text-gray-600 mt-1">例: paypal-secure-login.com</p>
+            </div>
+            <div className="bg-orange-50 p-3 rounded border-l-4 border-orange-500">
+              <p className="font-mono">*-verify.net</p>
+              <p className="text-xs text-gray-600 mt-1">例: amazon-verify.net</p>
+            </div>
+            <div className="bg-orange-50 p-3 rounded border-l-4 border-orange-500">
+              <p className="font-mono">*-support-id.com</p>
+              <p className="text-xs text-gray-600 mt-1">例: apple-support-id.com</p>
+            </div>
           </div>
-          <div className="bg-orange-50 p-3 rounded border-l-4 border-orange-500">
-            <p className="font-mono">*-support-id.com</p>
-            <p className="text-xs text-gray-600 mt-1">例: apple-support-id.com</p>
+        </div>
+
+        <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
+          <h3 className="font-bold text-lg mb-4 flex items-center gap-2">
+            <MessageSquare className="w-5 h-5 text-purple-600" />
+            疑わしいキーワード
+          </h3>
+          <div className="flex flex-wrap gap-2">
+            {['verify account', 'urgent action', 'suspended', 'アカウント確認', '緊急', 
+              '本人確認', 'パスワード更新', 'セキュリティ警告', '24時間以内', '今すぐ'].map((keyword, i) => (
+              <span key={i} className="bg-purple-100 text-purple-800 px-3 py-1 rounded-full text-sm">
+                {keyword}
+              </span>
+            ))}
           </div>
         </div>
-      </div>
 
-      <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
-        <h3 className="font-bold text-lg mb-4 flex items-center gap-2">
-          <MessageSquare className="w-5 h-5 text-purple-600" />
-          疑わしいキーワード
-        </h3>
-        <div className="flex flex-wrap gap-2">
-          {['verify account', 'urgent action', 'suspended', 'アカウント確認', '緊急', 
-            '本人確認', 'パスワード更新', 'セキュリティ警告', '24時間以内', '今すぐ'].map((keyword, i) => (
-            <span key={i} className="bg-purple-100 text-purple-800 px-3 py-1 rounded-full text-sm">
-              {keyword}
-            </span>
-          ))}
+        <div className="bg-white p-6 rounded-lg border-2 border-gray-200">
+          <h3 className="font-bold text-lg mb-2 flex items-center gap-2">
+            <Link className="w-5 h-5 text-indigo-600" />
+            相関グラフ
+          </h3>
+          <p className="text-sm text-gray-600 mb-4">
+            ノード {graphStats.nodes}件 ・ つながり {graphStats.edges}件（分析したメールの送信元・リンク先・電話番号）
+          </p>
+
+          {propagated.length > 0 && (
+            <div className="space-y-2 mb-4">
+              <h4 className="font-bold text-sm">危険なノードとのつながりで要注意になったもの</h4>
+              {propagated.map(node => (
+                <div key={`${node.type}:${node.value}`} className="bg-yellow-50 p-3 rounded border-l-4 border-yellow-500 text-sm flex justify-between">
+                  <span><strong>{GRAPH_NODE_LABELS[node.type]}</strong> <code className="font-mono">{node.value}</code></span>
+                  <span>{Math.round(node.risk * 100)}</span>
+                </div>
+              ))}
+            </div>
+          )}
+
+          <form onSubmit={handleGraphSearch} className="flex gap-2 mb-4">
+            <input
+              name="graphQuery"
+              type="text"
+              defaultValue={graphQuery}
+              placeholder="電話番号またはドメイン"
+              className="flex-1 p-3 border-2 border-gray-300 rounded-lg"
+            />
+            <button type="submit" className="px-6 bg-indigo-600 hover:bg-indigo-700 text-white font-bold rounded-lg">
+              <Search className="w-5 h-5" />
+            </button>
+          </form>
+
+          {graphQuery && (
+            graphNeighbors === null ? (
+              <p className="text-sm text-gray-600">グラフに登録されていません</p>
+            ) : (
+              <div className="space-y-2 text-sm">
+                {graphNeighbors.map(node => (
+                  <div
+                    key={`${node.type}:${node.value}`}
+                    className={`p-3 rounded border-l-4 flex justify-between ${
+                      node.known ? 'bg-red-50 border-red-500' : node.risk >= GRAPH_RISK_THRESHOLD ? 'bg-yellow-50 border-yellow-500' : 'bg-gray-50 border-gray-300'
+                    }`}
+                  >
+                    <span><strong>{GRAPH_NODE_LABELS[node.type]}</strong> <code className="font-mono">{node.value}</code>{node.known && ' （既知の危険）'}</span>
+                    <span>{Math.round(node.risk * 100)}</span>
+                  </div>
+                ))}
+              </div>
+            )
+          )}
         </div>
-      </div>
 
-      <div className="bg-blue-50 p-4 rounded-lg">
-        <p className="text-sm flex items-start gap-2">
-          <TrendingUp className="w-5 h-5 mt-0.5 flex-shrink-0" />
-          <span>このデータベースは継続的に更新されています。新しい詐欺パターンが検出され次第、追加されます。</span>
-        </p>
+        <div className="bg-blue-50 p-4 rounded-lg">
+          <p className="text-sm flex items-start gap-2">
+            <TrendingUp className="w-5 h-5 mt-0.5 flex-shrink-0" />
+            <span>このデータベースは継続的に更新されています。新しい詐欺パターンが検出され次第、追加されます。</span>
+          </p>
+        </div>
       </div>
-    </div>
-  );
+    );
+  };
 
   return (
     <div className="min-h-screen bg-gradient-to-br from-blue-50 to-indigo-100 p-4">
@@ -807,6 +3094,15 @@ const ScamPreventionApp = () => {
               <Mail className="w-4 h-4" />
               メール
             </button>
+            <button
+              onClick={() => { setActiveTab('screening'); setAnalysisResult(null); }}
+              className={`flex items-center gap-2 px-4 py-2 rounded-lg font-semibold transition ${
+                activeTab === 'screening' ? 'bg-blue-600 text-white' : 'bg-gray-100 hover:bg-gray-200'
+              }`}
+            >
+              <Activity className="w-4 h-4" />
+              着信判定
+            </button>
             <button
               onClick={() => { setActiveTab('quiz'); setAnalysisResult(null); }}
               className={`flex items-center gap-2 px-4 py-2 rounded-lg font-semibold transition ${
@@ -825,6 +3121,24 @@ const ScamPreventionApp = () => {
               <Database className="w-4 h-4" />
               DB
             </button>
+            <button
+              onClick={() => { setActiveTab('history'); setAnalysisResult(null); }}
+              className={`flex items-center gap-2 px-4 py-2 rounded-lg font-semibold transition ${
+                activeTab === 'history' ? 'bg-blue-600 text-white' : 'bg-gray-100 hover:bg-gray-200'
+              }`}
+            >
+              <Clock className="w-4 h-4" />
+              履歴
+            </button>
+            <button
+              onClick={() => { setActiveTab('admin'); setAnalysisResult(null); }}
+              className={`flex items-center gap-2 px-4 py-2 rounded-lg font-semibold transition ${
+                activeTab === 'admin' ? 'bg-blue-600 text-white' : 'bg-gray-100 hover:bg-gray-200'
+              }`}
+            >
+              <Server className="w-4 h-4" />
+              管理
+            </button>
             <button
               onClick={() => { setActiveTab('guide'); setAnalysisResult(null); }}
               className={`flex items-center gap-2 px-4 py-2 rounded-lg font-semibold transition ${
@@ -837,14 +3151,25 @@ const ScamPreventionApp = () => {
           </div>
         </div>
 
+        {/* セッション通知 */}
+        {sessionNotice && (
+          <div className="bg-yellow-50 border-l-4 border-yellow-500 rounded-lg mb-6 p-4 flex items-center justify-between">
+            <p className="text-sm">{sessionNotice}</p>
+            <button onClick={() => setSessionNotice(null)} className="text-sm text-gray-600 hover:text-gray-800">✕</button>
+          </div>
+        )}
+
         {/* メインコンテンツ */}
         <div className="bg-white rounded-lg shadow-lg p-6">
           {activeTab === 'home' && <HomeTab />}
           {activeTab === 'phone' && <PhoneTab />}
           {activeTab === 'url' && <UrlTab />}
           {activeTab === 'email' && <EmailTab />}
+          {activeTab === 'screening' && <ScreeningTab />}
           {activeTab === 'quiz' && <QuizTab />}
           {activeTab === 'database' && <DatabaseTab />}
+          {activeTab === 'history' && <HistoryTab />}
+          {activeTab === 'admin' && <AdminTab />}
           {activeTab === 'guide' && <GuideTab />}
         </div>
 